@@ -0,0 +1,142 @@
+# Earley Parser in Python 3 - Parsing many inputs in parallel
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import multiprocessing
+import os
+import pickle
+import queue
+from collections import deque
+from itertools import islice
+
+from .parser import Scanner, Recognizer, Parser
+
+
+class BatchParser:
+	'''Parses inputs one after another with a single Scanner, Recognizer and Parser.
+	Charts are released as soon as their value is built, so a worker's memory does not grow with the largest input it has seen.
+	With a Limits object as `limits`, an input that exceeds them fails with a LimitError.'''
+	def __init__(self, lexicon, grammar, start_nonterminal, limits=None):
+		self.scanner = Scanner(lexicon)
+		self.recognizer = Recognizer(grammar, keep_chart=False, prune=True, limits=limits)
+		self.parser = Parser(grammar)
+		self.start_nonterminal = start_nonterminal
+		grammar.compile()
+
+	def parse(self, input):
+		chart = self.recognizer.recognize(self.scanner.scan(input), self.start_nonterminal)
+		return self.parser.parse(chart, chart.tokens, release=True)
+
+	def parse_item(self, item):
+		'''Parses an (index, input) pair into an (index, value, error) triple. Errors are returned, not raised.'''
+		index, input = item
+		try:
+			return index, self.parse(input), None
+		except Exception as e:
+			return index, None, picklable(e)
+
+
+def picklable(e):
+	'''`e`, or a ValueError with the same message if `e` cannot be sent back from a worker process.'''
+	try:
+		pickle.dumps(e)
+	except Exception:
+		e = ValueError("{}: {}".format(type(e).__name__, e))
+	return e
+
+
+worker = None  # the BatchParser of a pool worker process
+worker_error = None  # or the exception raised while making it
+
+
+def init_worker(factory, start_nonterminal, limits):
+	global worker, worker_error
+	try:
+		lexicon, grammar = factory()
+		worker = BatchParser(lexicon, grammar, start_nonterminal, limits)
+	except Exception as e:
+		worker_error = picklable(e)  # an initializer that raises makes the pool start a new worker, forever
+
+
+def parse_in_worker(items):
+	if worker is None:
+		return [(index, None, worker_error) for index, input in items]
+	return [worker.parse_item(item) for item in items]
+
+
+def chunks(iterable, size):
+	'''Splits `iterable` into lists of `size` elements (the last one may be shorter), reading it only as they are taken.'''
+	iterator = iter(iterable)
+	while True:
+		chunk = list(islice(iterator, size))
+		if not chunk:
+			return
+		yield chunk
+
+
+def parse_many(factory, start_nonterminal, inputs, workers=None, chunksize=64, ordered=True, limits=None, window=4):
+	'''Parses every string of the iterable `inputs` in a pool of `workers` processes (default: one per CPU).
+
+	`factory` is called once in each worker and returns a (lexicon, grammar) pair. It has to be picklable, i.e. a function
+	defined at module level, so grammars with lambdas as rule functions never have to cross process boundaries. If it raises
+	in a worker, that exception is the error of every input the worker is given; with workers=0 it is raised.
+
+	Yields an (index, value, error) triple per input, where index is the position of the input in `inputs` and exactly one of
+	value and error is set (error is the exception raised while parsing that input). With ordered=True the results come in
+	input order, otherwise as soon as they are done. Inputs are sent to the workers in chunks of `chunksize`.
+	With workers=0 everything is parsed in the calling process. `limits` (a parser.Limits) apply to each input separately.
+
+	Inputs are read only as results are taken: at most `window` chunks per worker are being parsed or waiting to be
+	taken at any time, so memory holds at most workers * window * chunksize inputs and results, however long `inputs` is.
+	'''
+	items = enumerate(inputs)
+	if workers == 0:
+		lexicon, grammar = factory()
+		p = BatchParser(lexicon, grammar, start_nonterminal, limits)
+		for item in items:
+			yield p.parse_item(item)
+		return
+	if workers is None:
+		workers = os.cpu_count() or 1
+	in_flight = workers * window
+	with multiprocessing.Pool(workers, initializer=init_worker, initargs=(factory, start_nonterminal, limits)) as pool:
+		if ordered:
+			pending = deque()
+			for chunk in chunks(items, chunksize):
+				pending.append(pool.apply_async(parse_in_worker, (chunk,)))
+				if len(pending) >= in_flight:
+					yield from pending.popleft().get()
+			while pending:
+				yield from pending.popleft().get()
+		else:
+			done = queue.SimpleQueue()  # filled by the pool's result thread
+			pending = 0
+			for chunk in chunks(items, chunksize):
+				pool.apply_async(parse_in_worker, (chunk,), callback=done.put, error_callback=done.put)
+				pending += 1
+				if pending >= in_flight:
+					yield from finished(done.get())
+					pending -= 1
+			while pending:
+				yield from finished(done.get())
+				pending -= 1
+
+
+def finished(results):
+	'''The results of a chunk taken from the queue of parse_many, which holds the exception instead if the chunk failed.'''
+	if isinstance(results, BaseException):
+		raise results
+	return results
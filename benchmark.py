@@ -0,0 +1,585 @@
+# Earley Parser in Python 3 - Benchmarks
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+'''Benchmarks. Run as a module from the directory containing the package:
+	python -m <package>.benchmark [name ...]
+runs the micro-benchmarks (all of them by default), and
+	python -m <package>.benchmark suite [--sizes 10,100,...] [--cases calc,...] [--json out.json] [--compare old.json]
+runs the parse benchmark suite: every case at every size, with time and peak memory of the scan, recognize and parse
+phases reported separately. Results saved with --json on one commit can be compared against with --compare on another.
+'''
+
+import argparse
+import gc
+import importlib.util
+import io
+import json
+import mmap
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from .parser import Lexicon, Entry, Scanner, Recognizer, Parser, Grammar, CompiledGrammar, Rule, Token, Stats, Limits, LimitError, parse
+from .calc import math_lexicon, math_grammar, Calculator, run
+from .complex_grammar import ComplexGrammar, as_tuple, parse_rhs, example as list_example
+from .incremental import IncrementalParser
+from .codegen import generate, rule_actions
+from .optimize import optimize, report
+from .grammar_utils import Node, node_class, dump, stringify
+
+
+def best_of(func, repeat=5):
+	'''Runs func `repeat` times and returns (fastest wall time in seconds, last result).'''
+	best = None
+	for i in range(repeat):
+		t = time.perf_counter()
+		result = func()
+		t = time.perf_counter() - t
+		if best is None or t < best:
+			best = t
+	return best, result
+
+
+def keyword_lexicon(keywords=40):
+	'''A lexicon of `keywords` fixed keywords followed by identifiers, numbers and punctuation.'''
+	entries = [Entry('kw{:d}'.format(i), r'kw{:d}\b'.format(i)) for i in range(keywords)]
+	entries += [
+		Entry('ident', r'[a-z_A-Z][a-z_A-Z0-9]*', lambda m: m.group(0)),
+		Entry('number', r'[0-9]+(\.[0-9]+)?', lambda m: float(m.group(0))),
+		Entry('op', r'[-+*/%^=<>]', lambda m: m.group(0)),
+		Entry('(', r'\('),
+		Entry(')', r'\)'),
+		Entry(',', r','),
+		Entry(None, r'\s+'),
+	]
+	return Lexicon(entries)
+
+
+def keyword_text(words, keywords=40, seed=0):
+	rnd = random.Random(seed)
+	parts = []
+	for i in range(words):
+		c = rnd.random()
+		if c < 0.3:
+			parts.append('kw{:d}'.format(rnd.randrange(keywords)))
+		elif c < 0.6:
+			parts.append(rnd.choice(['foo', 'bar_baz', 'x1', 'value']))
+		elif c < 0.8:
+			parts.append(str(rnd.randrange(10000)))
+		else:
+			parts.append(rnd.choice('-+*/()=,'))
+	return " ".join(parts)
+
+
+def bench_scanner(words=20000):
+	'''Tokens per second of Scanner with and without the combined lexicon regex.'''
+	lexicon = keyword_lexicon()
+	text = keyword_text(words)
+	for combined in (False, True):
+		scanner = Scanner(lexicon, combined=combined)
+		t, tokens = best_of(lambda: list(scanner.scan(text)))
+		print("scanner combined={!s:<5} {:8d} tokens {:8.3f}s {:12.0f} tokens/s".format(combined, len(tokens), t, len(tokens) / t))
+
+
+def bench_scanner_input(words=500000):
+	'''Tokens per second and peak traced memory of scanning a file read into a str, memory-mapped, and read in chunks.'''
+	scanner = Scanner(keyword_lexicon(), combined=True)
+	with tempfile.TemporaryDirectory() as d:
+		path = os.path.join(d, 'input.txt')
+		with open(path, 'w') as f:
+			f.write(keyword_text(words))
+		size = os.path.getsize(path)
+
+		def read_str():
+			with open(path) as f:
+				return count_tokens(scanner.scan(f.read()))
+
+		def read_mmap():
+			with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+				return count_tokens(scanner.scan(m))
+
+		def read_chunks():
+			with open(path) as f:
+				return count_tokens(scanner.scan(f))
+
+		for name, func in (('str', read_str), ('mmap', read_mmap), ('chunks', read_chunks)):
+			tracemalloc.start()
+			func()
+			peak = tracemalloc.get_traced_memory()[1]
+			tracemalloc.stop()
+			t, tokens = best_of(func, repeat=3)
+			print("scanner input={:<6} {:5.1f} MiB {:8d} tokens {:8.3f}s {:10.0f} tokens/s peak {:8.2f} MiB".format(name, size / 2**20, tokens, t, tokens / t, peak / 2**20))
+
+
+def count_tokens(tokens):
+	n = 0
+	for t in tokens:
+		n += 1
+	return n
+
+
+def math_text(terms, seed=0, ops='+-*/^'):
+	'''A random calc.py expression with `terms` operands.'''
+	rnd = random.Random(seed)
+	parts = [str(rnd.randrange(100))]
+	for i in range(terms - 1):
+		parts.append(rnd.choice(ops))
+		parts.append(rnd.choice(['{:d}', '({:d})', 'sqrt({:d})', 'PI']).format(rnd.randrange(100)))
+	return " ".join(parts)
+
+
+def bench_memory(terms=2000):
+	'''Traced memory per chart edge for a calc.py expression (tokens are allocated before measuring).'''
+	tokens = list(Scanner(math_lexicon).scan(math_text(terms)))
+	gc.collect()
+	tracemalloc.start()
+	before = tracemalloc.get_traced_memory()[0]
+	chart = Recognizer(math_grammar).recognize(tokens, 'expression')
+	after, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+	edges = sum(len(s) for s in chart.sets)
+	print("memory {:8d} tokens {:9d} edges {:8.1f} bytes/edge (peak {:.1f} MiB)".format(len(tokens), edges, (after - before) / edges, (peak - before) / 2**20))
+
+
+def bench_right_recursion(sizes=(10, 100, 1000, 10000, 100000), plain_limit=2000):
+	'''Recognition and parse time of a right-recursive list (L -> x L | x) with and without Leo's optimization.'''
+	grammar = Grammar([
+		Rule('L', ('x', 'L'), lambda x, l: l + 1),
+		Rule('L', ('x',), lambda x: 1),
+	])
+	for n in sizes:
+		tokens = [Token('x', 'x', None)] * n
+		for leo in (False, True):
+			if not leo and n > plain_limit:
+				continue
+			recognizer = Recognizer(grammar, leo=leo)
+			t, chart = best_of(lambda: recognizer.recognize(tokens, 'L'), repeat=3)
+			edges = sum(len(s) for s in chart.sets)
+			tp, value = best_of(lambda: Parser(grammar).parse(chart, tokens), repeat=3)
+			print("right-recursion leo={!s:<5} {:7d} items {:9d} edges recognize {:8.3f}s parse {:8.3f}s".format(leo, n, edges, t, tp))
+
+
+def complex_rules(n, seed=0):
+	'''`n` ComplexGrammar rules over 50 nonterminals, with right-hand sides using all of its syntax.'''
+	rnd = random.Random(seed)
+	names = ["n{:d}".format(i) for i in range(50)] + ["T{:d}".format(i) for i in range(20)]
+
+	def term(depth):
+		r = rnd.random()
+		if depth > 2 or r < 0.5:
+			return rnd.choice(names)
+		inner = " ".join(term(depth + 1) for i in range(rnd.randint(1, 3)))
+		if r < 0.6:
+			return "[{}]".format(inner)
+		elif r < 0.7:
+			return "{{{}}}".format(inner)
+		elif r < 0.8:
+			return "{{{}:{}}}".format(inner, rnd.choice(names[50:]))
+		elif r < 0.9:
+			return "({})".format(inner)
+		return "({} | {})".format(inner, term(depth + 1))
+	return [(names[i % 50], (" ".join(term(0) for j in range(rnd.randint(1, 5))),), as_tuple) for i in range(n)]
+
+
+def bench_complex_grammar(rules=300):
+	'''Time to build a ComplexGrammar of `rules` rules, with the right-hand side parse cache empty and filled, and to compile it.'''
+	rule_list = complex_rules(rules)
+	parse_rhs.cache_clear()
+	t_cold, grammar = best_of(lambda: ComplexGrammar(rule_list), repeat=1)
+	t_warm, grammar = best_of(lambda: ComplexGrammar(rule_list), repeat=5)
+	t_compile, compiled = best_of(lambda: CompiledGrammar(grammar), repeat=1)
+	print("complex-grammar {:5d} rules -> {:5d} rules: build {:8.3f}s (cached right-hand sides {:8.3f}s), compile {:8.3f}s".format(rules, sum(len(r) for r in grammar.terms.values()), t_cold, t_warm, t_compile))
+
+
+def bench_dump(nodes=200000):
+	'''Memory per node of a random expression tree of dict based and of slot based nodes, and time and peak memory of
+	dumping the tree to a file, indented and compact, and of building it as a string.'''
+	rnd = random.Random(0)
+	BinOp = node_class('BinOp', ('left', 'op', 'right'))
+	for name, make in (("Node", lambda l, o, r: Node('BinOp', left=l, op=o, right=r)), ("node_class", BinOp)):
+		gc.collect()
+		tracemalloc.start()
+		base = tracemalloc.get_traced_memory()[0]
+		values = list(range(nodes + 1))
+		while len(values) > 1:  # merge random neighbours until a single tree is left
+			i = rnd.randrange(len(values) - 1)
+			values[i:i + 2] = [make(values[i], '+', values[i + 1])]
+		size = tracemalloc.get_traced_memory()[0] - base
+		tracemalloc.stop()
+		tree = values[0]
+		print("dump {:<10} {:8d} nodes {:8.1f} bytes/node".format(name, nodes, size / nodes))
+	with tempfile.TemporaryFile('w') as f:
+		for label, func in (
+			("dump", lambda: dump(tree, f)),
+			("dump compact", lambda: dump(tree, f, compact=True)),
+			("stringify", lambda: len(stringify(tree))),
+		):
+			f.seek(0)
+			t, peak, result = measure(func, 1)
+			print("dump {:<14} {:8.3f}s peak {:8.1f} MiB".format(label, t, peak / 2**20))
+
+
+def bench_incremental(terms=2000, edits=50, seed=0):
+	'''Time per single-character edit of a long calc.py expression, reparsed from scratch and with IncrementalParser.'''
+	rnd = random.Random(seed)
+	text = math_text(terms, ops='+-*')
+	digits = [i for i, c in enumerate(text) if c.isdigit()]
+	p = IncrementalParser(math_lexicon, math_grammar, 'expression')
+	p.parse(text)
+	t_full = t_inc = 0.0
+	recognized = spliced = 0
+	for n in range(edits):
+		i = rnd.choice(digits)
+		d = str(rnd.randrange(1, 10))
+		t = time.perf_counter()
+		value = p.edit(i, i + 1, d)
+		t_inc += time.perf_counter() - t
+		recognized += p.last_edit['recognized']
+		spliced += p.last_edit['spliced']
+		t = time.perf_counter()
+		full = parse(math_lexicon, math_grammar, 'expression', p.text)
+		t_full += time.perf_counter() - t
+		assert full == value
+	print("incremental {:6d} tokens full {:8.2f}ms/edit incremental {:8.2f}ms/edit ({:.1f} sets recognized, {:.0f} spliced in per edit)".format(
+		len(p.tokens), 1000 * t_full / edits, 1000 * t_inc / edits, recognized / edits, spliced / edits))
+
+
+def bench_stats(terms=2000):
+	'''Parse time of a calc.py expression without and with a Stats object, and the counts it collects.'''
+	text = math_text(terms, ops='+-*')
+	t_plain, value = best_of(lambda: parse(math_lexicon, math_grammar, 'expression', text))
+	t_stats, stats = best_of(lambda: parse_with_stats(text))
+	print("stats off {:8.3f}s on {:8.3f}s ({:+.1f}%)".format(t_plain, t_stats, 100 * (t_stats / t_plain - 1)))
+	print("stats {!r}".format(stats))
+
+
+def parse_with_stats(text):
+	stats = Stats()
+	parse(math_lexicon, math_grammar, 'expression', text, stats)
+	return stats
+
+
+def bench_calc(lines=20000, distinct=500):
+	'''Lines per second through the calc.py front-end, on a corpus of `lines` lines drawn from `distinct` expressions.'''
+	rnd = random.Random(0)
+	expressions = [math_text(rnd.randint(1, 12), seed=i) for i in range(distinct)]
+	corpus = [rnd.choice(expressions) + "\n" for i in range(lines)]
+
+	def naive():
+		out = io.StringIO()
+		for l in corpus:
+			try:
+				print(parse(math_lexicon, math_grammar, 'expression', l), file=out)
+			except Exception:
+				print("Error", file=out)
+		return out
+
+	t, out = best_of(naive, repeat=1)
+	print("calc {:<22} {:8d} lines {:8.3f}s {:10.0f} lines/s".format("parse() per line", lines, t, lines / t))
+	reference = out.getvalue()
+	for cache_size in (0, 1024):
+		calculator = Calculator(cache_size)
+		out = io.StringIO()
+		t, out = best_of(lambda: run(corpus, out, calculator, 4096) or out, repeat=1)
+		assert out.getvalue() == reference
+		print("calc {:<22} {:8d} lines {:8.3f}s {:10.0f} lines/s ({})".format("batch cache={:d}".format(cache_size), lines, t, lines / t, calculator.stats()))
+
+
+class Case:
+	'''A suite case: a lexicon, grammar and start symbol, and text(n) producing an input of about n tokens.
+	Sizes above max_size are skipped, for grammars whose chart grows faster than linearly.'''
+	def __init__(self, name, lexicon, grammar, start, text, max_size=None):
+		self.name = name
+		self.lexicon = lexicon
+		self.grammar = grammar
+		self.start = start
+		self.text = text
+		self.max_size = max_size
+
+
+def bench_limits(size=2000):
+	'''Recognition time of a calc.py expression without and with (unreached) Limits, and the time it takes the limits to
+	reject an input of the ambiguous suite grammar, which takes cubic time to recognize.'''
+	cases = {case.name: case for case in suite_cases()}
+	calc = cases['calc']
+	tokens = list(Scanner(calc.lexicon).scan(calc.text(size)))
+	for limits in (None, Limits(10**9, 10**9, 10**9, 3600)):
+		recognizer = Recognizer(calc.grammar, limits=limits)
+		t, chart = best_of(lambda: recognizer.recognize(tokens, calc.start), 5)
+		print("limits calc {:<32} {:6d} tokens {:8.3f}s".format("unlimited" if limits is None else "with limits", len(tokens), t))
+	ambiguous = cases['ambiguous']
+	tokens = list(Scanner(ambiguous.lexicon).scan(ambiguous.text(size)))
+	for name, limits in (("max_edges=100000", Limits(max_edges=100000)), ("timeout=0.1", Limits(timeout=0.1)), ("max_tokens=500", Limits(max_tokens=500))):
+		recognizer = Recognizer(ambiguous.grammar, limits=limits, keep_chart=False)
+		error = None
+		t = time.perf_counter()
+		try:
+			recognizer.recognize(tokens, ambiguous.start)
+		except LimitError as e:
+			error = e
+		t = time.perf_counter() - t
+		if error is None:
+			print("limits ambiguous {:<27} {:6d} tokens not rejected, recognized in {:8.3f}s".format(name, len(tokens), t))
+		else:
+			print("limits ambiguous {:<27} {:6d} tokens rejected after {:8.3f}s at token {:d}, {:d} edges".format(name, len(tokens), t, error.index, error.edges))
+
+
+def bench_lookahead(size=1000):
+	'''Chart edges and recognition time of every suite case at `size` tokens, without and with lookahead-filtered prediction.'''
+	for case in suite_cases():
+		n = min(size, case.max_size or size)
+		tokens = list(Scanner(case.lexicon).scan(case.text(n)))
+		case.grammar.compile()
+		edges = []
+		for lookahead in (False, True):
+			recognizer = Recognizer(case.grammar, lookahead=lookahead)
+			t, chart = best_of(lambda: recognizer.recognize(tokens, case.start), repeat=3)
+			edges.append(sum(len(s) for s in chart.sets))
+			print("lookahead={!s:<5} {:<16} {:6d} tokens {:9d} edges recognize {:8.3f}s".format(lookahead, case.name, len(tokens), edges[-1], t))
+		print("lookahead {:<16} {:.2f}x fewer edges".format(case.name, edges[0] / edges[1]))
+
+
+def bench_codegen(size=2000):
+	'''Recognition and parse time of every suite case at `size` tokens, interpreted and with a module generated by codegen,
+	and the time it takes to import that module.'''
+	with tempfile.TemporaryDirectory() as d:
+		for n, case in enumerate(suite_cases()):
+			size_n = min(size, case.max_size or size)
+			tokens = list(Scanner(case.lexicon).scan(case.text(size_n)))
+			recognizer = Recognizer(case.grammar)
+			parser = Parser(case.grammar)
+			path = os.path.join(d, "generated{:d}.py".format(n))
+			with open(path, "w") as f:
+				f.write(generate(case.grammar, [case.start]))
+			spec = importlib.util.spec_from_file_location("generated{:d}".format(n), path)
+			module = importlib.util.module_from_spec(spec)
+			spec.loader.exec_module(module)  # compiles the module to bytecode
+			t_import = time.perf_counter()
+			spec.loader.exec_module(module)
+			t_import = time.perf_counter() - t_import
+			actions = rule_actions(case.grammar)
+
+			def interpreted():
+				chart = recognizer.recognize(tokens, case.start)
+				return parser.parse(chart, tokens)
+			t_interpreted, expected = best_of(interpreted, 3)
+			t_generated, value = best_of(lambda: module.parse(tokens, actions=actions), 3)
+			assert value == expected
+			print("codegen {:<16} {:6d} tokens interpreted {:8.3f}s generated {:8.3f}s ({:.2f}x), import {:.1f}ms".format(case.name, len(tokens), t_interpreted, t_generated, t_interpreted / t_generated, t_import * 1000))
+
+
+def bench_optimize(size=2000):
+	'''Rules, chart edges and recognition time of every suite case at `size` tokens, before and after optimize().'''
+	for case in suite_cases():
+		n = min(size, case.max_size or size)
+		tokens = list(Scanner(case.lexicon).scan(case.text(n)))
+		optimized = optimize(case.grammar, case.start)
+		print("optimize {}:".format(case.name))
+		print(report(case.grammar, optimized, case.start, tokens))
+		times = []
+		for g in (case.grammar, optimized):
+			recognizer = Recognizer(g)
+			t, chart = best_of(lambda: recognizer.recognize(tokens, case.start), 3)
+			times.append(t)
+		print("recognize {:8.3f}s -> {:8.3f}s".format(*times))
+
+
+def bench_prune(size=20000):
+	'''Peak traced memory and time of recognizing and parsing every suite case at `size` tokens, without and with chart
+	pruning. The chart is released after parsing either way.'''
+	for case in suite_cases():
+		n = min(size, case.max_size or size)
+		tokens = list(Scanner(case.lexicon).scan(case.text(n)))
+		parser = Parser(case.grammar)
+		values = []
+		for prune in (False, True):
+			recognizer = Recognizer(case.grammar, keep_chart=False, prune=prune)
+
+			def run():
+				chart = recognizer.recognize(tokens, case.start)
+				return parser.parse(chart, tokens, release=True)
+			t, peak, value = measure(run, 3)
+			values.append(value)
+			print("prune={!s:<5} {:<16} {:6d} tokens peak {:8.1f} MiB {:8.3f}s".format(prune, case.name, len(tokens), peak / 2**20, t))
+		assert values[0] == values[1]
+
+
+def nested_list_text(n, seed=0):
+	'''A complex_grammar example input of about n tokens, nested at most 30 deep.'''
+	rnd = random.Random(seed)
+
+	def nested(budget, depth):
+		items = []
+		used = 2
+		while used < budget:
+			if depth < 30 and budget - used > 4 and rnd.random() < 0.2:
+				text, u = nested(min(budget - used, rnd.randint(3, 50)), depth + 1)
+			else:
+				text, u = str(rnd.randrange(100)), 1
+			items.append(text)
+			used += u + 1
+		return rnd.choice("({") + ", ".join(items) + rnd.choice(")}"), used
+	return nested(n, 0)[0]
+
+
+def suite_cases():
+	letters = Lexicon([
+		Entry('x', r'x', lambda m: m.group(0)),
+		Entry('o', r'o', lambda m: m.group(0)),
+		Entry('n', r'[0-9]+', lambda m: int(m.group(0))),
+		Entry('+', r'\+'),
+		Entry(None, r'\s+'),
+	])
+	list_lexicon, list_grammar = list_example()
+	return [
+		Case('calc', math_lexicon, math_grammar, 'expression', lambda n: math_text(max(1, n * 2 // 5), ops='+-*')),  # no / or ^, so evaluation cannot fail
+		Case('nested-list', list_lexicon, list_grammar, 'item', nested_list_text),
+		Case('left-recursive', letters, Grammar([
+			Rule('L', ('L', 'x'), lambda l, x: l + 1),
+			Rule('L', ('x',), lambda x: 1),
+		]), 'L', lambda n: "x" * n),
+		Case('right-recursive', letters, Grammar([
+			Rule('L', ('x', 'L'), lambda x, l: l + 1),
+			Rule('L', ('x',), lambda x: 1),
+		]), 'L', lambda n: "x" * n),
+		Case('ambiguous', letters, Grammar([
+			Rule('E', ('E', '+', 'E'), lambda l, o, r: l + r),
+			Rule('E', ('n',), lambda n: n),
+		]), 'E', lambda n: "+".join(["1"] * max(1, (n + 1) // 2)), max_size=300),  # cubic time
+		Case('epsilon', letters, Grammar([
+			Rule('S', ('S', 'I'), lambda s, i: s + i),
+			Rule('S', (), lambda: 0),
+			Rule('I', ('O', 'O', 'O', 'O', 'x'), lambda *a: 1 + sum(a[:-1])),
+			Rule('O', ('o',), lambda o: 1),
+			Rule('O', (), lambda: 0),
+		]), 'S', lambda n: "".join(random.Random(n).choice(["x", "ox", "oox", "ooox"]) for i in range(max(1, n // 2)))),
+	]
+
+
+def measure(func, repeat):
+	'''Runs func under tracemalloc once for its peak memory, then `repeat` times without it for the time.'''
+	gc.collect()
+	tracemalloc.start()
+	base = tracemalloc.get_traced_memory()[0]
+	result = func()
+	peak = tracemalloc.get_traced_memory()[1] - base
+	tracemalloc.stop()
+	del result
+	gc.collect()
+	t, result = best_of(func, repeat)
+	return t, peak, result
+
+
+def run_case(case, size):
+	text = case.text(size)
+	scanner = Scanner(case.lexicon)
+	recognizer = Recognizer(case.grammar)
+	parser = Parser(case.grammar)
+	case.grammar.compile()
+	repeat = 3 if size <= 1000 else 1
+	result = {'case': case.name, 'size': size}
+	t, peak, tokens = measure(lambda: list(scanner.scan(text)), repeat)
+	result.update(tokens=len(tokens), scan_s=t, scan_peak_bytes=peak)
+	t, peak, chart = measure(lambda: recognizer.recognize(tokens, case.start), repeat)
+	result.update(edges=sum(len(s) for s in chart.sets), recognize_s=t, recognize_peak_bytes=peak)
+	t, peak, value = measure(lambda: parser.parse(chart, tokens), repeat)
+	result.update(parse_s=t, parse_peak_bytes=peak)
+	return result
+
+
+def compare(results, baseline):
+	'''Prints the ratio of each phase time between `results` and the `baseline` results.'''
+	base = {(r['case'], r['size']): r for r in baseline['results']}
+	print("{:<16} {:>7} {:>10} {:>10} {:>10}  (new time / baseline time)".format("case", "size", "scan", "recognize", "parse"))
+	for r in results:
+		b = base.get((r['case'], r['size']))
+		if b is None:
+			continue
+		ratios = ["{:10.2f}".format(r[k] / b[k]) if b[k] else "{:>10}".format("-") for k in ('scan_s', 'recognize_s', 'parse_s')]
+		print("{:<16} {:>7d} {}".format(r['case'], r['size'], " ".join(ratios)))
+
+
+def suite(argv):
+	ap = argparse.ArgumentParser(prog="benchmark suite", description="Parse benchmark suite.")
+	ap.add_argument('--sizes', default="10,100,1000,10000,100000", help="comma separated input sizes in tokens")
+	ap.add_argument('--cases', default=None, help="comma separated case names (default: all)")
+	ap.add_argument('--json', default=None, help="write the results to this file")
+	ap.add_argument('--compare', default=None, help="compare against results previously written with --json")
+	args = ap.parse_args(argv)
+
+	sizes = [int(s) for s in args.sizes.split(",")]
+	cases = suite_cases()
+	if args.cases:
+		names = args.cases.split(",")
+		cases = [c for c in cases if c.name in names]
+	results = []
+	print("{:<16} {:>7} {:>7} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9}".format(
+		"case", "size", "tokens", "edges", "scan s", "recog s", "parse s", "scan MiB", "recog MiB", "parse MiB"))
+	for case in cases:
+		for size in sizes:
+			if case.max_size is not None and size > case.max_size:
+				continue
+			r = run_case(case, size)
+			results.append(r)
+			print("{case:<16} {size:>7d} {tokens:>7d} {edges:>9d} {scan_s:>9.4f} {recognize_s:>9.4f} {parse_s:>9.4f} ".format(**r) +
+				" ".join("{:>9.2f}".format(r[k] / 2**20) for k in ('scan_peak_bytes', 'recognize_peak_bytes', 'parse_peak_bytes')))
+			sys.stdout.flush()
+	output = {
+		'python': platform.python_version(),
+		'platform': platform.platform(),
+		'time': time.strftime("%Y-%m-%dT%H:%M:%S"),
+		'results': results,
+	}
+	if args.json:
+		with open(args.json, "w") as f:
+			json.dump(output, f, indent=1)
+	if args.compare:
+		with open(args.compare) as f:
+			compare(results, json.load(f))
+
+
+BENCHMARKS = {
+	'calc': bench_calc,
+	'codegen': bench_codegen,
+	'complex-grammar': bench_complex_grammar,
+	'dump': bench_dump,
+	'incremental': bench_incremental,
+	'limits': bench_limits,
+	'lookahead': bench_lookahead,
+	'memory': bench_memory,
+	'optimize': bench_optimize,
+	'prune': bench_prune,
+	'right-recursion': bench_right_recursion,
+	'scanner': bench_scanner,
+	'scanner-input': bench_scanner_input,
+	'stats': bench_stats,
+}
+
+
+def main(argv):
+	if argv and argv[0] == 'suite':
+		suite(argv[1:])
+		return
+	for name in argv or sorted(BENCHMARKS):
+		BENCHMARKS[name]()
+
+if __name__ == "__main__":
+	main(sys.argv[1:])
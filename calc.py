@@ -17,7 +17,11 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from parser import Grammar, Rule, Lexicon, Entry, parse
+from collections import OrderedDict
+try:
+	from .parser import Grammar, Rule, Lexicon, Entry, Scanner, Recognizer, Parser
+except ImportError:  # run as a script
+	from parser import Grammar, Rule, Lexicon, Entry, Scanner, Recognizer, Parser
 from math import sin, cos, tan, asin, acos, atan, sqrt, exp, log, log10, floor, ceil, fabs, erf, gamma
 
 constants = {
@@ -93,11 +97,78 @@ math_grammar = Grammar([
 	Rule('expression', ('expression4',), lambda e: e),
 ])
 
-if __name__ == '__main__':
-	from sys import stdin
-
-	for l in stdin:
+class Calculator:
+	'''Evaluates expressions one after another with a single Scanner, Recognizer and Parser.
+	Results (and errors) are kept in an LRU cache of `cache_size` entries keyed by the token stream (names and values), so
+	expressions that only differ in whitespace or number formatting share an entry.'''
+	def __init__(self, cache_size=1024):
+		self.scanner = Scanner(math_lexicon, combined=True)
+		self.recognizer = Recognizer(math_grammar, keep_chart=False)  # cached errors must not hold on to charts
+		self.parser = Parser(math_grammar)
+		self.cache = OrderedDict()
+		self.cache_size = cache_size
+		self.hits = 0
+		self.misses = 0
+
+	def evaluate(self, line):
+		tokens = list(self.scanner.scan(line))
+		key = tuple((t.name, t.value) for t in tokens)
+		if key in self.cache:
+			self.hits += 1
+			self.cache.move_to_end(key)
+			value, error = self.cache[key]
+		else:
+			self.misses += 1
+			value, error = None, None
+			try:
+				chart = self.recognizer.recognize(tokens, 'expression')
+				value = self.parser.parse(chart, chart.tokens)
+			except Exception as e:
+				error = e.with_traceback(None)
+			if self.cache_size > 0:
+				self.cache[key] = (value, error)
+				if len(self.cache) > self.cache_size:
+					self.cache.popitem(last=False)
+		if error is not None:
+			raise error.with_traceback(None)
+		return value
+
+	def stats(self):
+		return "{:d} hits, {:d} misses, {:d} cached".format(self.hits, self.misses, len(self.cache))
+
+
+def run(lines, out, calculator, buffer_lines=1):
+	'''Evaluates each line and writes the results (or "Error") to `out`, `buffer_lines` lines at a time.'''
+	buf = []
+	for l in lines:
 		try:
-			print(parse(math_lexicon, math_grammar, 'expression', l))
-		except:
-			print("Error")
+			buf.append(str(calculator.evaluate(l)))
+		except Exception:
+			buf.append("Error")
+		if len(buf) >= buffer_lines:
+			buf.append("")
+			out.write("\n".join(buf))
+			buf = []
+	if buf:
+		buf.append("")
+		out.write("\n".join(buf))
+
+
+if __name__ == '__main__':
+	import argparse
+	from sys import stdin, stdout, stderr
+
+	ap = argparse.ArgumentParser(description="Evaluates the expressions on standard input, one per line.")
+	ap.add_argument('--batch', action='store_true', help="buffer output instead of writing each result as soon as it is known")
+	ap.add_argument('--cache-size', type=int, default=1024, help="number of results to keep in the LRU cache (0 disables it)")
+	ap.add_argument('--stats', action='store_true', help="print cache statistics to standard error at the end")
+	args = ap.parse_args()
+
+	calculator = Calculator(args.cache_size)
+	if args.batch:
+		run(stdin, stdout, calculator, 4096)
+	else:
+		run(stdin, stdout, calculator)
+		stdout.flush()
+	if args.stats:
+		print(calculator.stats(), file=stderr)
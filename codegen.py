@@ -0,0 +1,420 @@
+# Earley Parser in Python 3 - Generating recognizer modules
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import ast
+import textwrap
+from types import ModuleType
+
+from .parser import CompiledGrammar
+
+PACKAGE = __name__.rpartition('.')[0]
+
+
+def rule_actions(grammar):
+	'''The rule functions of `grammar` in the order of the rules of a module generated from it, for its `actions` argument.'''
+	return [r.func for r in grammar.compile().rules]
+
+
+def importable(func):
+	'''The (module, qualified name) a generated module can import `func` from, or None for lambdas, closures, bound methods
+	and the like.'''
+	module = getattr(func, '__module__', None)
+	qualname = getattr(func, '__qualname__', None)
+	if module is None or qualname is None or module == '__main__' or '<' in qualname:
+		return None
+	owner = getattr(func, '__self__', None)
+	if owner is not None and not isinstance(owner, ModuleType):  # the import would give the unbound function
+		return None
+	return module, qualname
+
+
+def ints(values, wrap=False):
+	'''A tuple literal of the integers `values`. With wrap=True it is spread over lines of at most 120 characters.'''
+	body = ", ".join(str(v) for v in values) + ("," if len(values) == 1 else "")
+	if not wrap or not values:
+		return "(" + body + ")"
+	return "(\n" + textwrap.fill(body, 116, initial_indent="\t", subsequent_indent="\t") + "\n)"
+
+
+def symbol_literal(symbol):
+	text = repr(symbol)
+	try:
+		if ast.literal_eval(text) == symbol:
+			return text
+	except (ValueError, SyntaxError):
+		pass
+	raise ValueError("Symbol {!r} cannot be written as a Python literal.".format(symbol))
+
+
+def generate(grammar, start_nonterminals=None):
+	'''Returns the source of a module that recognizes and parses the language of `grammar`, given as a Grammar (or any of its
+	subclasses) or a CompiledGrammar.
+
+	The module holds the grammar as tables of integers: every symbol and every dotted rule (item) has a number, and the
+	prediction closures, FIRST sets and empty derivations of the nonterminals are precomputed. Its recognizer is the
+	algorithm of StreamingRecognizer with Leo's optimization, with edges as plain tuples and the chart set operations
+	written out in place, so importing the module builds no grammar and recognizing looks up nothing by name.
+	parse(tokens, start, actions=None) returns the same value as Recognizer and Parser, and raises the same ParseErrors.
+
+	Rule functions that can be imported (functions defined at module level) are imported by the module. The others, like
+	lambdas, have to be passed to parse() as `actions`, a sequence of functions in rule order; rule_actions(grammar)
+	returns it. `start_nonterminals` are the nonterminals parse() can start from (default: all); the first one is the
+	default start.'''
+	compiled = grammar if isinstance(grammar, CompiledGrammar) else grammar.compile()
+	symbols = compiled.symbols
+	symbol_ids = compiled.symbol_ids
+	nonterminals = len(compiled.nonterminals)
+	rules = compiled.rules
+	if start_nonterminals is None:
+		start_nonterminals = symbols[:nonterminals]
+	for s in start_nonterminals:
+		if s not in compiled.nonterminals:
+			raise ValueError("{!r} is not a nonterminal of the grammar.".format(s))
+
+	items = {}  # Item.number -> item id
+	item_next, item_lhs, item_rule, item_dot = [], [], [], []
+	for n, r in enumerate(rules):
+		for item in r.items:
+			items[item.number] = len(item_next)
+			item_next.append(-1 if item.complete else symbol_ids[item.next])
+			item_lhs.append(symbol_ids[r.lhs])
+			item_rule.append(n)
+			item_dot.append(item.dot)
+	start = {}
+	for s in start_nonterminals:
+		start[s] = (len(item_next), len(item_next) + 1)
+		item_next.extend((symbol_ids[s], -1))
+		item_lhs.extend((-1, -1))
+		item_rule.extend((-1, -1))
+		item_dot.extend((0, 1))
+
+	def null_edge(e):
+		if e is None:
+			return "None"
+		return "({:d}, 0, {}, {})".format(items[e.item.number], null_edge(e.previous), null_edge(e.completing))
+
+	out = []
+	w = out.append
+	w("# Generated by codegen.py from a grammar of {:d} rules. Do not edit.".format(len(rules)))
+	w("")
+	imports = {}
+	actions = []
+	for r in rules:
+		where = importable(r.func)
+		if where is None:
+			actions.append(None)
+		else:
+			alias = imports.setdefault(where[0], "_a{:d}".format(len(imports)))
+			actions.append("{}.{}".format(alias, where[1]))
+	for module, alias in imports.items():
+		w("import {} as {}".format(module, alias))
+	if PACKAGE:
+		w("try:")
+		w("\tfrom {}.parser import ParseError, describe_expected".format(PACKAGE))
+		w("except ImportError:  # used without the parser package")
+		w(textwrap.indent(FALLBACK, "\t"))
+	else:
+		w(FALLBACK)
+	w("")
+	w("# Rules, numbered as in rule_actions():")
+	for n, r in enumerate(rules):
+		w("#\t{:d}: {} ::= {}".format(n, r.lhs, " ".join(str(t) for t in r.rhs)))
+	w("")
+	w("SYMBOLS = ({},)".format(", ".join(symbol_literal(s) for s in symbols)))
+	w("NONTERMINALS = {:d}  # symbols below this number are nonterminals".format(nonterminals))
+	w("TERMINALS = {{{}}}".format(", ".join("{}: {:d}".format(symbol_literal(s), symbol_ids[s]) for s in symbols[nonterminals:])))
+	w("START = {{{}}}  # start nonterminal -> (initial item, complete item)".format(", ".join("{}: ({:d}, {:d})".format(symbol_literal(s), a, b) for s, (a, b) in start.items())))
+	w("DEFAULT_START = {}".format(symbol_literal(start_nonterminals[0]) if start_nonterminals else "None"))
+	w("ITEMS = {:d}".format(len(item_next)))
+	w("NEXT = {}  # item -> symbol after the dot, -1 if complete".format(ints(item_next, True)))
+	w("LHS = {}".format(ints(item_lhs, True)))
+	w("RULE = {}".format(ints(item_rule, True)))
+	w("DOT = {}".format(ints(item_dot, True)))
+	w("RHS = ({},)".format(", ".join(ints([symbol_ids[t] for t in r.rhs]) for r in rules)))
+	w("CLOSURE = ({},)".format(", ".join(ints([items[i.number] for i in compiled.closure[s]]) for s in symbols[:nonterminals])))
+	w("CLOSURE_SYMBOLS = ({},)".format(", ".join(ints([symbol_ids[t] for t in compiled.closure_symbols[s]]) for s in symbols[:nonterminals])))
+	w("FIRST = ({},)".format(", ".join("frozenset(({}))".format("".join(symbol_literal(t) + ", " for t in sorted(compiled.first[s], key=symbol_ids.get))) for s in symbols[:nonterminals])))
+	w("NULL = {{{}}}  # nullable nonterminal -> edge deriving the empty string".format(", ".join("{:d}: {}".format(symbol_ids[s], null_edge(e)) for s, e in compiled.null_edges.items())))
+	w("ACTIONS = ({},)".format(", ".join(a or "None" for a in actions)))
+	w("MISSING = {}  # rules whose function has to be passed as actions".format(ints([n for n, a in enumerate(actions) if a is None])))
+	w(RUNTIME)
+	return "\n".join(out)
+
+
+def write(grammar, path, start_nonterminals=None):
+	'''Writes the module generate() returns to `path`.'''
+	with open(path, "w") as f:
+		f.write(generate(grammar, start_nonterminals))
+
+
+FALLBACK = '''class ParseError(ValueError):
+	def __init__(self, message, index=None, token=None, pos=None, expected=(), chart=None):
+		ValueError.__init__(self, message)
+		self.index = index
+		self.token = token
+		self.pos = pos
+		self.expected = frozenset(expected)
+		self.chart = chart
+
+def describe_expected(expected):
+	if not expected:
+		return "the end of the input"
+	return "one of " + ", ".join(sorted(map(str, expected)))'''
+
+
+RUNTIME = r"""
+
+# An edge is a tuple (item, start, previous, completing), as in parser.Edge. A Leo transitive item is a tuple (waiting,
+# above, top), and an edge that Leo's optimization left out is a pair (transitive item, bottom), see parser.LeoEdge.
+
+
+def expected_terminals(waiting):
+	expected = set()
+	for s, edges in waiting.items():
+		if edges:
+			if s < NONTERMINALS:
+				expected.update(FIRST[s])
+			else:
+				expected.add(SYMBOLS[s])
+	return expected
+
+
+def leo_item(waits, leos, i, symbol):
+	path = []
+	while True:
+		memo = leos[i]
+		if symbol in memo:
+			t = memo[symbol]
+			break
+		waiting = waits[i].get(symbol)
+		if waiting is None or len(waiting) != 1 or NEXT[waiting[0][0] + 1] >= 0:
+			t = memo[symbol] = None
+			break
+		path.append((memo, symbol, waiting[0]))
+		i, symbol = waiting[0][1], LHS[waiting[0][0]]
+	for memo, symbol, e in reversed(path):
+		t = memo[symbol] = (e, t, t[2] if t is not None else e)
+	return t
+
+
+def recognize(tokens, start=DEFAULT_START):
+	'''Returns the complete edge of the start rule for `tokens`, any iterable of objects with the `name` of a terminal.'''
+	try:
+		initial, final = START[start]
+	except KeyError:
+		raise ValueError("{!r} is not a start nonterminal of this module.".format(start)) from None
+	waits = []  # the edges waiting on each symbol, of every closed chart set
+	leos = []
+	e = (initial, 0, None, None)
+	content = [e]
+	seen = {initial}
+	waiting = {NEXT[initial]: [e]}
+	j = 0
+	tokens = iter(tokens)
+	while True:
+		predicted = set()
+		leo = {}
+		waits.append(waiting)
+		leos.append(leo)
+		k = 0
+		while k < len(content):
+			state = content[k]
+			k += 1
+			item = state[0]
+			nxt = NEXT[item]
+			if nxt >= 0:
+				if nxt < NONTERMINALS:
+					if nxt not in predicted:
+						predicted.update(CLOSURE_SYMBOLS[nxt])
+						for i in CLOSURE[nxt]:
+							key = (j << 32) | i
+							if key not in seen:
+								seen.add(key)
+								e = (i, j, None, None)
+								content.append(e)
+								s = NEXT[i]
+								if s >= 0:
+									w = waiting.get(s)
+									if w is None:
+										waiting[s] = [e]
+									else:
+										w.append(e)
+					null = NULL.get(nxt)
+					if null is not None:
+						i = item + 1
+						key = (state[1] << 32) | i
+						if key not in seen:
+							seen.add(key)
+							e = (i, state[1], state, null)
+							content.append(e)
+							s = NEXT[i]
+							if s >= 0:
+								w = waiting.get(s)
+								if w is None:
+									waiting[s] = [e]
+								else:
+									w.append(e)
+			elif state[1] < j:
+				lhs = LHS[item]
+				t = leo_item(waits, leos, state[1], lhs)
+				if t is not None:
+					top = t[2]
+					i = top[0] + 1
+					key = (top[1] << 32) | i
+					if key not in seen:
+						seen.add(key)
+						e = (i, top[1], top, state if t[1] is None else (t, state))
+						content.append(e)
+						s = NEXT[i]
+						if s >= 0:
+							w = waiting.get(s)
+							if w is None:
+								waiting[s] = [e]
+							else:
+								w.append(e)
+					continue
+				for c in waits[state[1]].get(lhs, ()):
+					i = c[0] + 1
+					key = (c[1] << 32) | i
+					if key not in seen:
+						seen.add(key)
+						e = (i, c[1], c, state)
+						content.append(e)
+						s = NEXT[i]
+						if s >= 0:
+							w = waiting.get(s)
+							if w is None:
+								waiting[s] = [e]
+							else:
+								w.append(e)
+
+		token = next(tokens, None)
+		if token is None:
+			break
+		scanned = waiting.get(TERMINALS.get(token.name, -1), ())
+		if not scanned:
+			expected = expected_terminals(waiting)
+			pos = "" if token.pos is None else " (pos={:d})".format(token.pos)
+			msg = "Unexpected {!r} at token {:d}{}, expected {}".format(token, j, pos, describe_expected(expected))
+			raise ParseError(msg, j, token, token.pos, expected)
+		j += 1
+		content = []
+		seen = set()
+		waiting = {}
+		for c in scanned:
+			i = c[0] + 1
+			e = (i, c[1], c, token)
+			seen.add((c[1] << 32) | i)
+			content.append(e)
+			s = NEXT[i]
+			if s >= 0:
+				w = waiting.get(s)
+				if w is None:
+					waiting[s] = [e]
+				else:
+					w.append(e)
+
+	for e in content:
+		if e[0] == final:
+			return e
+	expected = expected_terminals(waiting)
+	raise ParseError("No complete parses exist: the input ends after {:d} tokens, expected {}.".format(j, describe_expected(expected)), j, expected=expected)
+
+
+def materialize(e):
+	t, c = e
+	while t[1] is not None:
+		w = t[0]
+		c = (w[0] + 1, w[1], w, c)
+		t = t[1]
+	return c
+
+
+def children(edge):
+	children = []
+	while edge is not None and edge[3] is not None:
+		c = edge[3]
+		if type(c) is tuple and len(c) == 2:
+			c = materialize(c)
+		children.append(c)
+		edge = edge[2]
+	children.reverse()
+	return children
+
+
+def edge_repr(edge):
+	rule = RULE[edge[0]]
+	rhs = [str(SYMBOLS[s]) for s in RHS[rule]]
+	rhs.insert(DOT[edge[0]], ".")
+	return "({} ::= {} @ {})".format(SYMBOLS[LHS[edge[0]]] or "", " ".join(rhs), str(edge[1]))
+
+
+def build(root, actions):
+	stack = [(root, children(root), [])]
+	while True:
+		edge, ch, values = stack[-1]
+		if len(values) < len(ch):
+			c = ch[len(values)]
+			if type(c) is tuple:
+				stack.append((c, children(c), []))
+			else:
+				values.append(c.value)
+			continue
+		try:
+			value = actions[RULE[edge[0]]](*values)
+		except Exception as e:
+			raise ValueError("Failed to build node for {}".format(edge_repr(edge))) from e
+		stack.pop()
+		if not stack:
+			return value
+		stack[-1][2].append(value)
+
+
+def parse(tokens, start=DEFAULT_START, actions=None):
+	'''The value of the first parse of `tokens`, like parser.Parser. `actions` are the rule functions, in rule order.'''
+	if actions is None:
+		if MISSING:
+			raise ValueError("The functions of rules {} cannot be imported, pass them as actions.".format(", ".join(map(str, MISSING))))
+		actions = ACTIONS
+	root = recognize(tokens, start)[3]
+	if len(root) == 2:
+		root = materialize(root)
+	return build(root, actions)
+"""
+
+
+def main(argv):
+	import argparse
+	import importlib
+
+	ap = argparse.ArgumentParser(description="Generates a recognizer module for a grammar.")
+	ap.add_argument('grammar', help="MODULE:NAME of a Grammar, or of a function returning a Grammar or a (lexicon, grammar) pair")
+	ap.add_argument('start', nargs='*', help="the start nonterminals (default: all nonterminals)")
+	ap.add_argument('-o', '--output', required=True, help="the file to write the module to")
+	args = ap.parse_args(argv)
+
+	module, _, name = args.grammar.partition(':')
+	grammar = getattr(importlib.import_module(module), name)
+	if callable(grammar):
+		grammar = grammar()
+	if isinstance(grammar, tuple):
+		grammar = grammar[1]
+	write(grammar, args.output, args.start or None)
+
+if __name__ == "__main__":
+	import sys
+	main(sys.argv[1:])
@@ -15,10 +15,163 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from .parser import Grammar, Rule, Lexicon, Entry, parse
+import re
+from functools import lru_cache
+
+from .parser import Grammar, Rule, Lexicon, Entry, Token, ParseError, describe_expected, hilight_excerpt, parse, identity
 from .epsilon_grammar import EpsilonGrammar
 
 
+# Actions of the generated rules. These are module level functions rather than lambdas so grammars can be pickled.
+def as_tuple(*a):
+	return a
+
+
+def nothing():
+	return None
+
+
+def start_list(x):
+	return [x]
+
+
+def append(l, x):
+	l.append(x)  # every derivation builds its own list, so it is never shared
+	return l
+
+
+class Regroup:
+	'''Calls `func` with the arguments of a rule rearranged by `shape`, a tuple with an entry per argument of `func`: the
+	number of an argument of the rule, or a tuple of such entries, passed as a tuple. This is how groups are inlined into
+	the rules using them, with a single call per rule.'''
+	__slots__ = ('func', 'shape')
+
+	def __init__(self, func, shape):
+		self.func = func
+		self.shape = shape
+
+	def __call__(self, *args):
+		return self.func(*[args[s] if s.__class__ is int else self.build(s, args) for s in self.shape])
+
+	@classmethod
+	def build(cls, shape, args):
+		return tuple(args[s] if s.__class__ is int else cls.build(s, args) for s in shape)
+
+	def __getstate__(self):
+		return (self.func, self.shape)
+
+	def __setstate__(self, state):
+		self.func, self.shape = state
+
+
+def regroup(func, shape):
+	'''`func` itself if `shape` passes every argument in order, a Regroup otherwise.'''
+	if shape == tuple(range(len(shape))):
+		return func
+	return Regroup(func, shape)
+
+
+def shifted(shape, offset):
+	if isinstance(shape, int):
+		return shape + offset
+	return tuple(shifted(s, offset) for s in shape)
+
+
+def element(shape):
+	'''The shape of the single value of a repeated or alternative term: itself if it is one argument, else a tuple.'''
+	return shape[0] if len(shape) == 1 else shape
+
+
+def alternatives(term):
+	if term["type"] == "alt":
+		return alternatives(term["left"]) + alternatives(term["right"])
+	return [term]
+
+
+class RhsParser:
+	'''Recursive descent parser for the right-hand sides of ComplexGrammar rules. Builds the same terms as parsing them with
+	ComplexGrammar.gr_grammar, and raises a ParseError where that would, but takes a single pass over the tokens.
+	An empty right-hand side gives an 'empty' term.'''
+	lexeme = re.compile(r'\s*(?:([A-Za-z_][A-Za-z_0-9]*)|([|\[\]{}:()]))')
+	names = {'|': 'alt', '[': 'lbrack', ']': 'rbrack', '{': 'lbrace', '}': 'rbrace', ':': 'detail', '(': 'lgroup', ')': 'rgroup'}
+	starts = frozenset(('token', 'lbrack', 'lbrace', 'lgroup'))  # the tokens a term2 can start with
+
+	def __init__(self, text):
+		self.tokens = []
+		pos = 0
+		end = len(text.rstrip())
+		while pos < end:
+			m = self.lexeme.match(text, pos)
+			if m is None:
+				pos = len(text) - len(text[pos:].lstrip())
+				raise ParseError("No token recognized at pos={:d} ({})".format(pos, hilight_excerpt(text, pos)), pos=pos)
+			if m.group(1) is not None:
+				self.tokens.append(Token('token', m.group(1), m.group(1), m.start(1)))
+			else:
+				self.tokens.append(Token(self.names[m.group(2)], m.group(2), None, m.start(2)))
+			pos = m.end()
+		self.i = 0
+
+	def peek(self):
+		return self.tokens[self.i].name if self.i < len(self.tokens) else None
+
+	def expect(self, *names):
+		if self.peek() not in names:
+			self.fail(names)
+		self.i += 1
+		return self.tokens[self.i - 1]
+
+	def fail(self, expected):
+		if self.i >= len(self.tokens):
+			raise ParseError("No complete parses exist: the input ends after {:d} tokens, expected {}.".format(self.i, describe_expected(expected)), self.i, expected=expected)
+		token = self.tokens[self.i]
+		raise ParseError("Unexpected {!r} at token {:d} (pos={:d}), expected {}".format(token, self.i, token.pos, describe_expected(expected)), self.i, token, token.pos, expected)
+
+	def parse(self):
+		if not self.tokens:
+			return {'type': 'empty'}
+		t = self.term()
+		if self.i < len(self.tokens):
+			self.fail(self.starts | {'alt'})
+		return t
+
+	def term(self):
+		t = self.term1()
+		while self.peek() in self.starts:
+			t = {'type': 'concat', 'left': t, 'right': self.term1()}
+		return t
+
+	def term1(self):
+		t = self.term2()
+		while self.peek() == 'alt':
+			self.i += 1
+			t = {'type': 'alt', 'left': t, 'right': self.term2()}
+		return t
+
+	def term2(self):
+		kind = self.expect(*self.starts).name
+		if kind == 'token':
+			return {'type': 'token', 'token': self.tokens[self.i - 1].value}
+		t = self.term()
+		if kind == 'lbrack':
+			self.expect('rbrack')
+			return {'type': 'optional', 'term': t}
+		elif kind == 'lgroup':
+			self.expect('rgroup')
+			return {'type': 'group', 'term': t}
+		if self.expect('rbrace', 'detail').name == 'rbrace':
+			return {'type': 'many', 'term': t}
+		sep = self.expect('token').value
+		self.expect('rbrace')
+		return {'type': 'many_sep', 'term': t, 'sep': sep}
+
+
+@lru_cache(maxsize=4096)
+def parse_rhs(text):
+	'''The term for the right-hand side `text`, see RhsParser. Results are cached and shared, so they must not be modified.'''
+	return RhsParser(text).parse()
+
+
 class ComplexGrammar(EpsilonGrammar):
 	'''Write grammars with some more complicated syntax for optional, alternative, or repeated parts.
 	term2 (tightest binding operators)
@@ -36,6 +189,14 @@ class ComplexGrammar(EpsilonGrammar):
 	Check out the normal grammar this generates. Might be interesting to see how it's done.
 	Regex analogy: [] = ?, {} = +, [{}] = *
 	{A:B} can be A, or A B A, or A B A B A, or A B A B A B A, ...
+
+	Groups are inlined into the rule they appear in, and the rule function gets their values through a Regroup, so each
+	rule of the result calls a single function. Alternatives, optional and repeated terms get a nonterminal of their own.
+	Repetitions are left recursive and append to a single list, so a list of n values takes O(n) time to build.
+	A repeated or alternative term made of several values is passed as a tuple of them.
+
+	The right-hand sides are parsed with RhsParser (see parse_rhs); gr_tokens and gr_grammar define the same syntax as an
+	ordinary grammar. The names of the generated nonterminals only depend on the rules given, in order.
 	'''
 	gr_tokens = Lexicon([
 		Entry('alt', r'\|', lambda x: None),
@@ -69,49 +230,55 @@ class ComplexGrammar(EpsilonGrammar):
 			runners[n] = num + 1
 			return n + str(num)
 
-		def simplify_term(parent, term, prods, runners={}):
+		def simplify_term(parent, term, prods, runners):
+			'''Returns the symbols `term` expands to, and the shape of the values it passes to a rule (see Regroup).'''
 			if term["type"] == "concat":
-				return simplify_term(parent, term["left"], prods, runners) + simplify_term(parent, term["right"], prods, runners)
+				left, left_shape = simplify_term(parent, term["left"], prods, runners)
+				right, right_shape = simplify_term(parent, term["right"], prods, runners)
+				return left + right, left_shape + shifted(right_shape, len(left))
 			elif term["type"] == "alt":
 				alt_name = gen_name(parent, "alt", runners)
-				prods.append(Rule(alt_name, simplify_term(alt_name, term["left"], prods, runners), lambda x: x))
-				prods.append(Rule(alt_name, simplify_term(alt_name, term["right"], prods, runners), lambda x: x))
-				return [alt_name]
+				for alt in alternatives(term):
+					alt_sim, alt_shape = simplify_term(alt_name, alt, prods, runners)
+					prods.append(Rule(alt_name, alt_sim, regroup(identity, (element(alt_shape),))))
+				return [alt_name], (0,)
 			elif term["type"] == "optional":
 				opt_name = gen_name(parent, "opt", runners)
-				prods.append(Rule(opt_name, [], lambda: None))
-				prods.append(Rule(opt_name, simplify_term(opt_name, term["term"], prods, runners), lambda *a: a))
-				return [opt_name]
+				opt_sim, opt_shape = simplify_term(opt_name, term["term"], prods, runners)
+				prods.append(Rule(opt_name, [], nothing))
+				prods.append(Rule(opt_name, opt_sim, regroup(as_tuple, opt_shape)))
+				return [opt_name], (0,)
 			elif term["type"] == "many":
 				many_name = gen_name(parent, "many", runners)
-				many_sim = simplify_term(many_name, term["term"], prods, runners)
-				prods.append(Rule(many_name, many_sim, lambda x: [x]))
-				prods.append(Rule(many_name, many_sim + [many_name], lambda x, y: [x] + y))
-				return [many_name]
+				many_sim, many_shape = simplify_term(many_name, term["term"], prods, runners)
+				prods.append(Rule(many_name, many_sim, regroup(start_list, (element(many_shape),))))
+				prods.append(Rule(many_name, [many_name] + many_sim, regroup(append, (0, shifted(element(many_shape), 1)))))
+				return [many_name], (0,)
 			elif term["type"] == "many_sep":
 				many_sep_name = gen_name(parent, "sep", runners)
-				many_sep_sim = simplify_term(many_sep_name, term["term"], prods, runners)
-				prods.append(Rule(many_sep_name, many_sep_sim, lambda x: [x]))
-				prods.append(Rule(many_sep_name, many_sep_sim + [term["sep"], many_sep_name], lambda x, y, z: [x] + z))
-				return [many_sep_name]
+				many_sep_sim, many_sep_shape = simplify_term(many_sep_name, term["term"], prods, runners)
+				prods.append(Rule(many_sep_name, many_sep_sim, regroup(start_list, (element(many_sep_shape),))))
+				prods.append(Rule(many_sep_name, [many_sep_name, term["sep"]] + many_sep_sim, regroup(append, (0, shifted(element(many_sep_shape), 2)))))
+				return [many_sep_name], (0,)
 			elif term["type"] == "group":
-				grp_name = gen_name(parent, "grp", runners)
-				grp_sim = simplify_term(grp_name, term["term"], prods, runners)
-				prods.append(Rule(grp_name, grp_sim, lambda *a: a))
-				return [grp_name]
+				grp_sim, grp_shape = simplify_term(parent, term["term"], prods, runners)
+				return grp_sim, (grp_shape,)
 			elif term["type"] == "token":
-				return [term["token"]]
-			return []
+				return [term["token"]], (0,)
+			return [], ()
 
 		prods = []
+		runners = {}
 		for rule in rule_list:
 			if isinstance(rule, (tuple, list)):
 				rule = Rule(*rule)
-			prods.append(Rule(rule.lhs, tuple(simplify_term(rule.lhs, parse(ComplexGrammar.gr_tokens, ComplexGrammar.gr_grammar, 'term', " ".join(rule.rhs)), prods)), rule.func))
+			sim, shape = simplify_term(rule.lhs, parse_rhs(" ".join(rule.rhs)), prods, runners)
+			prods.append(Rule(rule.lhs, tuple(sim), regroup(rule.func, shape), rule.priority))
 		EpsilonGrammar.__init__(self, prods)
 
 
-def main():
+def example():
+	'''The lexicon and grammar of the example: nested lists of numbers, with any mix of parentheses and braces.'''
 	lex = Lexicon([
 		Entry('LPAREN', r'\(', lambda x: None),
 		Entry('RPAREN', r'\)', lambda x: None),
@@ -126,7 +293,11 @@ def main():
 		('item', ('NUMBER',), lambda n: n),
 		('item', ('(LPAREN|LBRACE) [{item:COMMA}] (RPAREN|RBRACE)',), lambda l, i, a: list(i and i[0] or []))
 	])
+	return lex, grm
 
+
+def main():
+	lex, grm = example()
 	print(parse(lex, grm, 'item', '({5, 3}, ((1, 2), (4, 7, {)}))'))
 
 if __name__ == "__main__":
@@ -15,29 +15,14 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from .parser import Rule, Grammar
-from itertools import chain
-
-
-def space_out_args(nrs, spacing, args):
-	res = ()
-	g = (a for a in args)
-	for t, nonnull in spacing:
-		if not nonnull:
-			res += (nrs[t].func(),)
-		else:
-			res += (next(g),)
-	return res
-
-
-def gen_lambda(nrs, rule, variant):
-	# Don't define the lambda in situ. Closing over loop variables will be immensely frustrating.
-	return lambda *args: rule.func(*space_out_args(nrs, variant, args))
+from .parser import Grammar
 
 
 class EpsilonGrammar(Grammar):
 	'''This grammar accepts rules with no terms on the right side (Epsilon rules).
-	It works by converting the epsilon-grammar to a non-epsilon grammar.
+	The Recognizer handles these natively by skipping over nullable symbols as it predicts them (after Aycock and Horspool),
+	so the rules are kept as they are. This class additionally records which nonterminals are nullable (`nullability`)
+	and the epsilon rule of each nonterminal that has one (`nully_rules`).
 	'''
 	def __init__(self, rules):
 		Grammar.__init__(self, rules)
@@ -63,23 +48,3 @@ class EpsilonGrammar(Grammar):
 
 		for t in self.terms:
 			nullable(t)
-
-		def null_variants(terms):
-			if len(terms) == 0:
-				yield ()
-			else:
-				head = terms[0]
-				tail = terms[1:]
-				for v in null_variants(tail):
-					yield ((head, True),) + v
-					if self.nullability.get(head, False):
-						yield ((head, False),) + v
-
-		new_terms = {}
-		for rul in chain(*self.terms.values()):
-			for variant in null_variants(rul.rhs):
-				if len(variant) > 0:  # leave out "T := " rules
-					nrf = gen_lambda(self.nully_rules, rul, variant)
-					new_terms.setdefault(rul.lhs, []).append(Rule(rul.lhs, tuple(x[0] for x in variant if x[1]), nrf))
-
-		self.terms = new_terms
@@ -0,0 +1,228 @@
+# Earley Parser in Python 3 - Shared packed parse forests
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from .parser import Token, NullEdge, LeoEdge, Scanner, Recognizer
+
+VISITING = object()
+
+
+def by_priority(edge, alternatives):
+	'''Disambiguator preferring the alternative derived with the rules of highest `priority`. Alternatives are compared node
+	by node in the order of derivation_nodes(): first by the rule of the last child, then by the rules below it, then by
+	the child before it, and so on, with tokens as priority 0. Ambiguous nodes inside an alternative are read as the
+	recognizer derived them first (they are disambiguated when they are built). Ties go to the derivation found first.'''
+	best = 0
+	for i in range(1, len(alternatives)):
+		if compare_derivations(alternatives[i], alternatives[best]) > 0:
+			best = i
+	return best
+
+
+def derivation_nodes(previous, completing):
+	'''Yields the nodes of the derivation (previous, completing) depth first, last child first: each child, then the nodes
+	below it, then the child before it. Sending True instead of None skips the nodes below the node just yielded.'''
+	stack = [(previous, completing)]
+	while stack:
+		previous, completing = stack.pop()
+		if completing is None:
+			continue
+		stack.append((previous.previous, previous.completing))
+		skip = yield completing
+		if not skip and not isinstance(completing, Token):
+			stack.append((completing.previous, completing.completing))
+
+
+def compare_derivations(a, b):
+	'''1 if the (previous, completing) derivation `a` comes first by priority (see by_priority), -1 if `b` does, 0 on a tie.
+	Nodes shared by both are not descended into, as they would compare equal.'''
+	nodes_a, nodes_b = derivation_nodes(*a), derivation_nodes(*b)
+	x, y = next(nodes_a, None), next(nodes_b, None)
+	while x is not None and y is not None:
+		if x is y:
+			x, y = send(nodes_a, True), send(nodes_b, True)
+			continue
+		px = 0 if isinstance(x, Token) else x.rule.priority
+		py = 0 if isinstance(y, Token) else y.rule.priority
+		if px != py:
+			return 1 if px > py else -1
+		x, y = next(nodes_a, None), next(nodes_b, None)
+	return 0
+
+
+def send(generator, value):
+	try:
+		return generator.send(value)
+	except StopIteration:
+		return None
+
+
+class Forest:
+	'''All parses of an input, as recorded in a chart built with Recognizer(..., forest=True).
+
+	The chart is a shared packed parse forest: a node is an edge together with the set it ends in, and each of its
+	derivations is a (previous, completing) pair, so the forest takes polynomial space however many parses there are.
+	count() tells how many parses there are, trees() lazily computes the value of each one in turn, and parse() extracts a
+	single value, letting a disambiguator pick among the derivations of each ambiguous node on the way.
+	'''
+	def __init__(self, chart):
+		self.chart = chart
+		roots = [s for s in chart[-1] if s.rule.lhs is None and s.complete()]
+		if len(roots) == 0:
+			raise ValueError("No complete parses exist.")
+		self.root = roots[0]
+		self.end = len(chart) - 1
+		self.counts = None
+
+	def derivations(self, edge, end):
+		'''The derivations of the node (edge, end) as (previous, previous end, completing, completing end) tuples.
+		Edges of the initial dot position have a single derivation with previous and completing None.'''
+		if isinstance(edge, LeoEdge):
+			edge = edge.materialize()
+		pairs = [(edge.previous, edge.completing)]
+		sset = self.chart[end]
+		packed = getattr(sset, 'packed', None)
+		if packed and sset.index.get(edge.key()) is edge:
+			pairs.extend(packed.get(edge.key(), ()))
+		result = []
+		for previous, completing in pairs:
+			if isinstance(completing, LeoEdge):
+				completing = completing.materialize()
+			if completing is None:
+				result.append((None, end, None, end))
+			elif isinstance(completing, Token):
+				result.append((previous, end - 1, completing, end))
+			elif isinstance(completing, NullEdge):
+				result.append((previous, end, completing, end))
+			else:
+				result.append((previous, completing.start, completing, end))
+		return result
+
+	def count(self):
+		'''The number of distinct parse trees. Raises ValueError if a cyclic grammar makes it infinite.
+		Empty derivations are not told apart: a nullable nonterminal deriving the empty string counts once however many
+		ways it can do so, as the chart only holds one of them (see CompiledGrammar.null_edges).'''
+		if self.counts is not None:
+			return self.counts[(id(self.root), self.end)]
+		counts = {}
+		stack = [(self.root, self.end)]
+		while stack:
+			edge, end = stack[-1]
+			key = (id(edge), end)
+			state = counts.get(key)
+			if state is None:
+				counts[key] = VISITING
+				for previous, prev_end, completing, comp_end in self.derivations(edge, end):
+					for node in ((previous, prev_end), (completing, comp_end)):
+						if node[0] is None or isinstance(node[0], Token):
+							continue
+						s = counts.get((id(node[0]), node[1]))
+						if s is VISITING:
+							raise ValueError("Infinitely many parses: {!r} derives itself.".format(node[0]))
+						if s is None:
+							stack.append(node)
+			elif state is VISITING:
+				total = 0
+				for previous, prev_end, completing, comp_end in self.derivations(edge, end):
+					n = 1
+					for node, node_end in ((previous, prev_end), (completing, comp_end)):
+						if node is not None and not isinstance(node, Token):
+							n *= counts[(id(node), node_end)]
+					total += n
+				counts[key] = total
+				stack.pop()
+			else:
+				stack.pop()
+		self.counts = counts
+		return counts[(id(self.root), self.end)]
+
+	def node_count(self, node, end):
+		if node is None or isinstance(node, Token):
+			return 1
+		return self.counts[(id(node), end)]
+
+	def build(self, choose, index=0):
+		'''Computes the value of one parse tree, with an explicit stack like Parser.build.
+		choose(edge, end, derivations, index) returns (chosen derivation, index for its previous, index for its completing);
+		the indices are passed down to the recursive choices, so trees can be numbered.'''
+		def children(edge, end, index):
+			ch = []
+			while True:
+				derivation, prev_index, comp_index = choose(edge, end, self.derivations(edge, end), index)
+				previous, prev_end, completing, comp_end = derivation
+				if completing is None:
+					break
+				ch.append((completing, comp_end, comp_index))
+				edge, end, index = previous, prev_end, prev_index
+			ch.reverse()
+			return ch
+
+		stack = [(self.root, children(self.root, self.end, index), [])]
+		while True:
+			edge, ch, values = stack[-1]
+			if len(values) < len(ch):
+				c, c_end, c_index = ch[len(values)]
+				if isinstance(c, Token):
+					values.append(c.value)
+				else:
+					stack.append((c, children(c, c_end, c_index), []))
+				continue
+			try:
+				value = edge.rule.func(*values)
+			except Exception as e:
+				raise ValueError("Failed to build node for {!r}".format(edge)) from e
+			stack.pop()
+			if not stack:
+				return value
+			stack[-1][2].append(value)
+
+	def tree(self, n):
+		'''The value of parse tree number n, 0 <= n < count().'''
+		total = self.count()
+		if not 0 <= n < total:
+			raise IndexError("parse tree index out of range")
+
+		def choose(edge, end, derivations, index):
+			for d in derivations:
+				c = self.node_count(d[2], d[3])
+				k = self.node_count(d[0], d[1]) * c
+				if index < k:
+					return d, index // c, index % c
+				index -= k
+			raise IndexError("parse tree index out of range")
+		return self.build(choose, n)
+
+	def trees(self):
+		'''Lazily yields the value of every parse tree.'''
+		for n in range(self.count()):
+			yield self.tree(n)
+
+	def parse(self, disambiguate=None):
+		'''The value of a single parse tree. At every node with several derivations, disambiguate(edge, derivations) returns
+		the index of the one to use, where a derivation is a (previous, completing) pair. By default the first one
+		found is used, which is what Parser.parse returns.'''
+		def choose(edge, end, derivations, index):
+			if len(derivations) > 1 and disambiguate is not None:
+				return derivations[disambiguate(edge, [(d[0], d[2]) for d in derivations])], 0, 0
+			return derivations[0], 0, 0
+		return self.build(choose)
+
+
+def parse_forest(lexicon, grammar, start_nonterminal, input):
+	'''Like parser.parse, but returns the Forest of all parses.'''
+	s = Scanner(lexicon)
+	r = Recognizer(grammar, forest=True)
+	return Forest(r.recognize(s.scan(input), start_nonterminal))
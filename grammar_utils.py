@@ -15,12 +15,12 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import io
 
-class Node:
-	'''Like a dictionary but with an extra "type identifier" for the node.'''
-	def __init__(self, typ, **kwargs):
-		self.type = typ
-		self.data = kwargs
+
+class BaseNode:
+	'''What dump() needs of a node: its `type` and items(), the (field name, value) pairs.'''
+	__slots__ = ()
 
 	def __str__(self):
 		return stringify(self)
@@ -28,25 +28,142 @@ class Node:
 	def __repr__(self):
 		return stringify(self)
 
+
+class Node(BaseNode):
+	'''Like a dictionary but with an extra "type identifier" for the node.'''
+	def __init__(self, typ, **kwargs):
+		self.type = typ
+		self.data = kwargs
+
 	def __getattr__(self, attr):
-		return self.data[attr]
+		try:
+			return self.__dict__['data'][attr]
+		except KeyError:
+			raise AttributeError(attr) from None
+
+	def items(self):
+		return self.data.items()
+
+
+class SlotNode(BaseNode):
+	'''Base class of the classes made by node_class(). Fields are passed like function arguments, and all of them must be given.'''
+	__slots__ = ()
+	fields = ()
+
+	def __init__(self, *args, **kwargs):
+		if len(args) > len(self.fields):
+			raise TypeError("{!r} nodes have {:d} fields, {:d} given".format(self.type, len(self.fields), len(args)))
+		for f, v in zip(self.fields, args):
+			setattr(self, f, v)
+		for f, v in kwargs.items():
+			if f not in self.fields:
+				raise TypeError("{!r} nodes have no field {!r}".format(self.type, f))
+			if f in self.fields[:len(args)]:
+				raise TypeError("{!r} node field {!r} given twice".format(self.type, f))
+			setattr(self, f, v)
+		if len(args) + len(kwargs) != len(self.fields):
+			missing = [f for f in self.fields[len(args):] if f not in kwargs]
+			raise TypeError("{!r} nodes need the fields {}".format(self.type, ", ".join(map(repr, missing))))
+
+	def items(self):
+		return [(f, getattr(self, f)) for f in self.fields]
+
+	def __reduce__(self):
+		return (make_node, (self.type, self.fields, tuple(getattr(self, f) for f in self.fields)))
+
+
+node_classes = {}
+slot_node_members = frozenset(dir(SlotNode)) | {'type'}  # 'type', 'fields', 'items' and the like, which fields would hide
+
+
+def node_class(typ, fields):
+	'''The node class for nodes of type `typ` with the field names `fields`. Its instances keep the fields in slots rather
+	than a dict, so they are smaller and attribute access is a plain slot lookup. Classes are made once per type and fields.'''
+	fields = tuple(fields)
+	cls = node_classes.get((typ, fields))
+	if cls is None:
+		clashes = [f for f in fields if f in slot_node_members]
+		if clashes:
+			raise ValueError("{} cannot be node fields, SlotNode has members of that name.".format(", ".join(map(repr, clashes))))
+		name = typ if isinstance(typ, str) and typ.isidentifier() else "SlotNode"
+		cls = node_classes[(typ, fields)] = type(name, (SlotNode,), {'__slots__': fields, 'type': typ, 'fields': fields})
+	return cls
+
+
+def make_node(typ, fields, values):
+	'''Rebuilds a pickled node of a class made by node_class().'''
+	return node_class(typ, fields)(*values)
+
+
+def dump(x, fp, indent='\t', compact=False, level=0):
+	'''Serializes a tree of nodes, lists and tuples (anything else is written as its repr()) to the file-like object `fp`.
+	The tree is walked without recursion and written out in pieces as it goes, so neither the depth nor the size of the tree
+	is limited by the stack or by memory. With compact=True there are no line breaks or indentation. See stringify for the
+	format; `level` is the indentation level of the first line.'''
+	out = []
+	write = out.append
+	stack = []  # (iterator over the entries, level of the entries, whether the entries are node fields, closing bracket)
+	while True:
+		opened = False
+		if isinstance(x, BaseNode):
+			items = x.items()
+			if not items:
+				write("{!r} {{}}".format(x.type) if compact else "{!r} {{ }}".format(x.type))
+			else:
+				write("{!r} {{".format(x.type))
+				stack.append((iter(items), level + 1, True, "}"))
+				opened = True
+		elif isinstance(x, (list, tuple)):
+			if not x:
+				write("[]" if compact else "[ ]")
+			else:
+				write("[")
+				stack.append((iter(x), level + 1, False, "]"))
+				opened = True
+		else:
+			write(repr(x))
+
+		while stack:
+			entries, level, fields, close = stack[-1]
+			entry = next(entries, stack)
+			if entry is stack:
+				stack.pop()
+				level -= 1
+				write(close if compact else "\n" + indent * level + close)
+				opened = False
+				continue
+			if compact:
+				if not opened:
+					write(", ")
+			else:
+				write(("\n" if opened else ",\n") + indent * level)
+			if fields:
+				write("{!r}: ".format(entry[0]))
+				x = entry[1]
+			else:
+				x = entry
+			break
+		else:
+			fp.write("".join(out))
+			return
+		if len(out) >= 4096:
+			fp.write("".join(out))
+			out = []
+			write = out.append
 
 
-def stringify(x, indent='\t', level=0):
+def stringify(x, indent='\t', level=0, compact=False):
 	'''Serialize Node trees to strings with indentation. Format is similar to json, but puts the node type in front.
-	Example: NodeType {
-		key1: [
+	Example: 'NodeType' {
+		'key1': [
 			value1,
-			NodeType {}
+			'NodeType' { }
 		],
-		key2: NodeType {
-			key3: value3
+		'key2': 'NodeType' {
+			'key3': value3
 		}
 	}
 	'''
-	if isinstance(x, Node):
-		return "{!r}".format(x.type) + "{ }" if not x.data else "{\n" + ",\n".join("{}{!r}: {}".format(indent * (level + 1), k, stringify(v, indent, level + 1) for k, v in x.data.items())) + "\n" + (indent * level) + "}"
-	elif isinstance(x, (list, tuple)):
-		return "[ ]" if not(x) else "[\n" + ",\n".join("{}{}".format(indent * (level + 1), stringify(v, indent, level + 1)) for v in x) + "\n" + (indent * level) + "]"
-	else:
-		return repr(x)
+	fp = io.StringIO()
+	dump(x, fp, indent, compact, level)
+	return fp.getvalue()
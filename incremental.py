@@ -0,0 +1,194 @@
+# Earley Parser in Python 3 - Incremental reparsing
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from .parser import Chart, Scanner, StreamingRecognizer, Parser
+
+
+class IncrementalParser:
+	'''Parses a document and reparses it after each edit, redoing as little work as possible.
+
+	An edit relexes the text from the end of the token before the first token it touches, until the new tokens line up with
+	the old ones again past the edited range. The chart sets before the first relexed token are reused, and the new tokens
+	are fed to the recognizer until a chart set matches the corresponding old one: same items in the same order, with every
+	incomplete one started before the relexed tokens or in that set itself (complete edges are never looked at from later
+	sets, except through derivations). From there on the recognizer would do exactly what it did before, so the
+	rest of the old chart is spliced in: the matched set takes the derivations of the new one, and if the number of tokens
+	changed, the start indices after it are shifted. The value is therefore always the one parse() returns for the whole text.
+
+	Tokens are assumed to depend only on the text up to the end of the token following them (the usual case; a lexicon
+	entry with a long lookahead can break this). Parse forests are not supported.
+
+	After each parse, `text`, `tokens`, `chart` and `value` describe the current document, and `last_edit` counts the
+	tokens relexed and the chart sets reused, recognized and spliced in. The old chart and tokens are modified by an edit, so
+	they must not be used afterwards. If the text cannot be parsed, the ParseError is raised but the document is still
+	updated, and the chart is kept up to the error for the next edit.
+	'''
+	def __init__(self, lexicon, grammar, start_nonterminal, combined=False, leo=True):
+		self.scanner = Scanner(lexicon, combined)
+		self.compiled = grammar.compile()
+		self.parser = Parser(grammar)
+		self.start_nonterminal = start_nonterminal
+		self.leo = leo
+		self.text = ""
+		self.tokens = None  # None if the text could not be scanned
+		self.chart = None  # covers only the first tokens if recognition failed
+		self.value = None
+		self.last_edit = None
+
+	def stream(self):
+		return StreamingRecognizer(self.compiled, self.start_nonterminal, self.leo, keep_chart=False)
+
+	def parse(self, text):
+		'''Parses `text` from scratch and makes it the current document.'''
+		self.text = text
+		self.tokens = None
+		self.chart = None
+		self.value = None
+		self.tokens = list(self.scanner.scan(text))
+		self.last_edit = {'relexed': len(self.tokens), 'reused': 0, 'recognized': 1, 'spliced': 0}
+		return self.recognize(self.stream(), 0)
+
+	def edit(self, start, end, replacement):
+		'''Replaces text[start:end] with `replacement` and returns the value of the new document.'''
+		if not 0 <= start <= end <= len(self.text):
+			raise IndexError("edit range out of bounds")
+		text = self.text[:start] + replacement + self.text[end:]
+		if self.tokens is None:
+			return self.parse(text)
+		old_tokens = self.tokens
+		old_chart = self.chart
+		shift = len(replacement) - (end - start)
+		new_end = start + len(replacement)
+
+		# relex from the end of the token before the first one that touches the edit
+		r = max(0, first_token_ending_at(old_tokens, start) - 1)
+		window = []
+		resume = len(old_tokens)  # the first old token that follows the relexed ones
+		self.text = text
+		self.tokens = None
+		self.chart = None
+		self.value = None
+		for t in self.scanner.scan(text, token_end(old_tokens[r - 1]) if r > 0 else 0):
+			if t.pos >= new_end and t.pos - shift >= end:
+				i = first_token_at(old_tokens, t.pos - shift)
+				if i < len(old_tokens) and old_tokens[i].pos == t.pos - shift:
+					resume = i
+					break
+			window.append(t)
+		if shift:
+			for t in old_tokens[resume:]:
+				t.pos += shift
+		self.tokens = old_tokens[:r] + window + old_tokens[resume:]
+
+		# chart set j of the new chart corresponds to set j - delta of the old one once the window has been fed
+		delta = len(window) - (resume - r)
+		reused = min(r, len(old_chart) - 1) + 1
+		stream = self.stream()
+		stream.chart = Chart()
+		stream.chart.sets = old_chart.sets[:reused]
+		stream.chart.tokens = self.tokens[:reused - 1]
+		stream.closed = reused
+		self.last_edit = {'relexed': len(window), 'reused': reused, 'recognized': 0, 'spliced': 0}
+		return self.recognize(stream, reused - 1, old_chart, r + len(window), delta)
+
+	def recognize(self, stream, n, old_chart=None, converge=None, delta=0):
+		'''Feeds self.tokens[n:] to `stream`, whose chart shares its first n + 1 sets with `old_chart`. From set `converge`
+		on, each new set j is compared with old set j - delta, and once they match the rest of the old chart is spliced in.'''
+		tokens = self.tokens
+		chart = stream.chart
+		first = n
+		try:
+			while n < len(tokens):
+				if old_chart is not None and n >= converge and first < n - delta < len(old_chart):
+					stream.close()
+					if matches(chart[n], old_chart[n - delta], first, n, n - delta):
+						self.splice(stream, old_chart, n, delta)
+						n = len(chart) - 1
+						old_chart = None
+						continue
+				stream.feed(tokens[n])
+				self.last_edit['recognized'] += 1
+				n += 1
+			self.value = self.parser.parse(stream.finish(), tokens)
+		finally:
+			self.chart = chart
+		return self.value
+
+	def splice(self, stream, old_chart, n, delta):
+		'''Replaces chart set n of the stream, which matches old set n - delta, and everything after it with the old sets.'''
+		chart = stream.chart
+		old_n = n - delta
+		for a, b in zip(chart[n].content, old_chart[old_n].content):
+			b.start = a.start
+			b.previous = a.previous
+			b.completing = a.completing
+		tail = old_chart.sets[old_n:]
+		tail[0].index = {e.key(): e for e in tail[0].content}
+		if delta:
+			for sset in tail[1:]:
+				for e in sset.content:
+					if e.start >= old_n:
+						e.start += delta
+				sset.index = {e.key(): e for e in sset.content}
+		chart.sets[n:] = tail
+		chart.tokens.extend(self.tokens[n:len(chart) - 1])
+		stream.closed = len(chart)
+		self.last_edit['spliced'] = len(tail)
+
+
+def token_end(t):
+	return t.pos + len(t.text)
+
+
+def first_token_ending_at(tokens, pos):
+	'''The index of the first token ending at or after `pos`.'''
+	lo, hi = 0, len(tokens)
+	while lo < hi:
+		mid = (lo + hi) // 2
+		if token_end(tokens[mid]) < pos:
+			lo = mid + 1
+		else:
+			hi = mid
+	return lo
+
+
+def first_token_at(tokens, pos):
+	'''The index of the first token starting at or after `pos`.'''
+	lo, hi = 0, len(tokens)
+	while lo < hi:
+		mid = (lo + hi) // 2
+		if tokens[mid].pos < pos:
+			lo = mid + 1
+		else:
+			hi = mid
+	return lo
+
+
+def matches(new, old, first, j, old_j):
+	'''Whether chart sets `new` (number j) and `old` (number old_j) hold the same items in the same order, each incomplete
+	one started either in a set up to `first`, which both charts share, or in the set itself.'''
+	if len(new) != len(old):
+		return False
+	for a, b in zip(new.content, old.content):
+		if a.item is not b.item:
+			return False
+		if a.item.complete:
+			continue
+		if a.start != b.start or a.start > first:
+			if a.start != j or b.start != old_j:
+				return False
+	return True
@@ -0,0 +1,233 @@
+# Earley Parser in Python 3 - Grammar optimization
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from .parser import Grammar, Rule, Recognizer, Parser
+
+
+# Rule functions of the rewritten rules. These are classes rather than closures so optimized grammars can be pickled.
+class Compose:
+	'''Applies `inner` to the arguments, then each of the `outer` functions to the result, innermost first: the function of
+	a rule A -> γ standing for a chain of unit rules A -> B -> ... -> γ.'''
+	__slots__ = ('outer', 'inner')
+
+	def __init__(self, outer, inner):
+		if isinstance(inner, Compose):
+			self.outer = inner.outer + (outer,)
+			self.inner = inner.inner
+		else:
+			self.outer = (outer,)
+			self.inner = inner
+
+	def __call__(self, *args):
+		value = self.inner(*args)
+		for f in self.outer:
+			value = f(value)
+		return value
+
+	def __getstate__(self):
+		return (self.outer, self.inner)
+
+	def __setstate__(self, state):
+		self.outer, self.inner = state
+
+
+class Splice:
+	'''The function of a rule whose symbol number `index` was replaced by the `length` symbols of a rule with function
+	`inner`: those arguments are passed to `inner`, and its value to `outer` in their place.'''
+	__slots__ = ('outer', 'index', 'length', 'inner')
+
+	def __init__(self, outer, index, length, inner):
+		self.outer = outer
+		self.index = index
+		self.length = length
+		self.inner = inner
+
+	def __call__(self, *args):
+		i, j = self.index, self.index + self.length
+		return self.outer(*args[:i], self.inner(*args[i:j]), *args[j:])
+
+	def __getstate__(self):
+		return (self.outer, self.index, self.length, self.inner)
+
+	def __setstate__(self, state):
+		self.outer, self.index, self.length, self.inner = state
+
+
+def rule_list(grammar):
+	return [r for rules in grammar.terms.values() for r in rules]
+
+
+def remove_dead(rules, start_nonterminals):
+	'''Drops the rules that use unproductive nonterminals (those deriving no string of terminals), then the rules of the
+	nonterminals that cannot be reached from the start nonterminals.'''
+	nonterminals = {r.lhs for r in rules}
+	productive = set()
+	changed = True
+	while changed:
+		changed = False
+		for r in rules:
+			if r.lhs not in productive and all(t in productive or t not in nonterminals for t in r.rhs):
+				productive.add(r.lhs)
+				changed = True
+	rules = [r for r in rules if r.lhs in productive and all(t in productive or t not in nonterminals for t in r.rhs)]
+
+	reached = [s for s in start_nonterminals]
+	reachable = set(reached)
+	by_lhs = {}
+	for r in rules:
+		by_lhs.setdefault(r.lhs, []).append(r)
+	for s in reached:  # grows while iterating
+		for r in by_lhs.get(s, ()):
+			for t in r.rhs:
+				if t in by_lhs and t not in reachable:
+					reachable.add(t)
+					reached.append(t)
+	return [r for r in rules if r.lhs in reachable]
+
+
+def left_recursive(rules):
+	'''The nonterminals B that derive B γ for some γ.'''
+	nonterminals = {r.lhs for r in rules}
+	nullable = set()
+	changed = True
+	while changed:
+		changed = False
+		for r in rules:
+			if r.lhs not in nullable and all(t in nullable for t in r.rhs):
+				nullable.add(r.lhs)
+				changed = True
+	corners = {nt: set() for nt in nonterminals}  # the nonterminals each one can start with
+	for r in rules:
+		for t in r.rhs:
+			if t in nonterminals:
+				corners[r.lhs].add(t)
+			if t not in nullable:
+				break
+	result = set()
+	for nt in nonterminals:
+		reached = list(corners[nt])
+		seen = set(reached)
+		for s in reached:  # grows while iterating
+			for t in corners[s]:
+				if t not in seen:
+					seen.add(t)
+					reached.append(t)
+		if nt in seen:
+			result.add(nt)
+	return result
+
+
+def collapse_units(rules):
+	'''Replaces every unit rule A -> B by rules A -> γ for the rules B -> γ, following chains of unit rules, with the rule
+	functions composed. Cycles of unit rules are dropped, as are rules that duplicate an earlier one of the same lhs.
+
+	Unit rules A -> B with B left recursive are kept: their copies would make the recognizer advance the left recursive
+	rules of both A and B over every B, which costs more edges than the unit rule saves.'''
+	by_lhs = {}
+	for r in rules:
+		by_lhs.setdefault(r.lhs, []).append(r)
+	keep = left_recursive(rules)
+
+	def expand(rule, seen):
+		if len(rule.rhs) != 1 or rule.rhs[0] not in by_lhs or rule.rhs[0] in keep:
+			return [(rule.rhs, rule.func, rule.priority)]
+		b = rule.rhs[0]
+		if b in seen:
+			return []
+		expanded = []
+		for r in by_lhs[b]:
+			for rhs, func, priority in expand(r, seen | {b}):
+				expanded.append((rhs, Compose(rule.func, func), priority))
+		return expanded
+
+	result = []
+	for lhs, lhs_rules in by_lhs.items():
+		have = set()
+		for r in lhs_rules:
+			for rhs, func, priority in expand(r, {lhs}):
+				if tuple(rhs) not in have:
+					have.add(tuple(rhs))
+					result.append(Rule(lhs, rhs, func, priority))
+	return result
+
+
+def inline_single_use(rules, start_nonterminals):
+	'''Replaces each nonterminal N that occurs exactly once in all right-hand sides, is not a start nonterminal and does not
+	occur in its own rules by its right-hand sides: A -> α N β becomes A -> α γ β for every rule N -> γ.
+	If N has several rules this is only done with α empty, as copies of α would all be advanced over the same input.'''
+	while True:
+		by_lhs = {}
+		uses = {}
+		for r in rules:
+			by_lhs.setdefault(r.lhs, []).append(r)
+			for i, t in enumerate(r.rhs):
+				uses.setdefault(t, []).append((r, i))
+		for n, n_rules in by_lhs.items():
+			if n in start_nonterminals or len(uses.get(n, ())) != 1:
+				continue
+			user, index = uses[n][0]
+			if user.lhs == n or (index > 0 and len(n_rules) > 1):
+				continue
+			break
+		else:
+			return rules
+		result = []
+		for r in rules:
+			if r is user:
+				for nr in n_rules:
+					rhs = tuple(user.rhs[:index]) + tuple(nr.rhs) + tuple(user.rhs[index + 1:])
+					result.append(Rule(user.lhs, rhs, Splice(user.func, index, len(nr.rhs), nr.func), user.priority))
+			elif r.lhs != n:
+				result.append(r)
+		rules = result
+
+
+def optimize(grammar, start_nonterminals, units=True, inline=True, dead=True):
+	'''Returns a Grammar for the same language as `grammar`, parsed from `start_nonterminals` (a nonterminal or a list of
+	them), with fewer rules and nonterminals for the recognizer to go through. Each step can be turned off: `dead`
+	removes unproductive and unreachable symbols (before, between and after the other steps), `units` collapses chains of
+	unit rules (see collapse_units), `inline` inlines nonterminals used only once (see inline_single_use).
+
+	The rule functions are combined so every parse has the same value as with `grammar`. Removed nonterminals can no longer
+	be used as start nonterminals. Where the input is ambiguous, a different derivation may be chosen.'''
+	if isinstance(start_nonterminals, str):
+		start_nonterminals = [start_nonterminals]
+	rules = rule_list(grammar)
+	if dead:
+		rules = remove_dead(rules, start_nonterminals)
+	if units:
+		rules = collapse_units(rules)
+		if dead:  # the rules of nonterminals only used by unit rules, which would count as uses for inlining
+			rules = remove_dead(rules, start_nonterminals)
+	if inline:
+		rules = inline_single_use(rules, set(start_nonterminals))
+	if dead:
+		rules = remove_dead(rules, start_nonterminals)
+	return Grammar(rules)
+
+
+def report(grammar, optimized, start_nonterminal, tokens=None):
+	'''Describes the rule and nonterminal counts of `grammar` and of `optimized`, and with a list of `tokens`, the chart size
+	and value of parsing them with each.'''
+	lines = []
+	for name, g in (("original", grammar), ("optimized", optimized)):
+		line = "{:<9} {:4d} rules {:4d} nonterminals".format(name, len(rule_list(g)), len(g.terms))
+		if tokens is not None:
+			chart = Recognizer(g).recognize(tokens, start_nonterminal)
+			line += " {:8d} chart edges, value {!r:.40}".format(sum(len(s) for s in chart.sets), Parser(g).parse(chart, tokens))
+		lines.append(line)
+	return "\n".join(lines)
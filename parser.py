@@ -15,30 +15,91 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import hashlib
+import json
+import mmap
+import os
 import re
+from itertools import count
+from sys import intern, maxsize
+from time import perf_counter
+
+
+def identity(x):
+	return x
+
+
+def no_value(*args):
+	return None
 
 
 class Rule:
-	def __init__(self, lhs, rhs, func):
-		self.lhs = lhs
+	def __init__(self, lhs, rhs, func, priority=0):
+		self.lhs = intern(lhs) if isinstance(lhs, str) else lhs
 		if isinstance(rhs, str):
 			rhs = rhs.split(" ")
-		self.rhs = rhs
+		self.rhs = type(rhs)(intern(t) if isinstance(t, str) else t for t in rhs)
 		self.func = func
+		self.priority = priority  # only used to disambiguate parse forests, see forest.by_priority
+		self.items = [Item(self, dot) for dot in range(len(self.rhs) + 1)]
+		for i in range(len(self.rhs)):
+			self.items[i].advance = self.items[i + 1]
 
 	def __repr__(self):
 		return "Rule{{} :== {}}".format(self.lhs or "-", " ".join(self.rhs))
 
+	def __getstate__(self):
+		# Item numbers are only unique within a process, so items are rebuilt when unpickling
+		state = self.__dict__.copy()
+		del state['items']
+		return state
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self.items = [Item(self, dot) for dot in range(len(self.rhs) + 1)]
+		for i in range(len(self.rhs)):
+			self.items[i].advance = self.items[i + 1]
+
 	def __eq__(self, other):
 		return self.lhs == other.lhs and self.rhs == other.rhs
 
 
+class Item:
+	'''A rule with a dot in its right-hand side. Everything an edge needs to know about its rule and dot is precomputed here.
+	Items are numbered globally; an edge is identified by its start and the number of its item (see Edge.key).'''
+	__slots__ = ('rule', 'dot', 'next', 'complete', 'advance', 'number')
+	numbers = count()
+
+	def __init__(self, rule, dot):
+		self.rule = rule
+		self.dot = dot
+		self.complete = dot >= len(rule.rhs)
+		self.next = None if self.complete else rule.rhs[dot]
+		self.advance = None
+		self.number = next(Item.numbers)
+
+	def __repr__(self):
+		return "({} ::= {})".format(self.rule.lhs or "", " ".join(list(self.rule.rhs[:self.dot]) + ["."] + list(self.rule.rhs[self.dot:])))
+
+
 class Grammar:
 	def __init__(self, rule_list):
 		self.terms = {}
+		self.compiled = None
 		for r in rule_list:
 			self.terms.setdefault(r.lhs, []).append(r)
 
+	def __getstate__(self):
+		state = self.__dict__.copy()
+		state['compiled'] = None  # refers to the items of the rules, rebuilt on demand
+		return state
+
+	def compile(self, cache_dir=None):
+		'''Returns the CompiledGrammar for this grammar, building it on first use. The rules must not change afterwards.'''
+		if self.compiled is None:
+			self.compiled = CompiledGrammar(self, cache_dir)
+		return self.compiled
+
 	def __getitem__(self, term):
 		return self.terms[term]
 
@@ -49,76 +110,495 @@ class Grammar:
 		return self.terms.get(key, default)
 
 
+class CompiledGrammar:
+	'''Tables derived from a Grammar for the Recognizer: numbered symbols, the nonterminals and terminals, the nullable
+	nonterminals, the FIRST set of every nonterminal (the terminals its derivations can start with), and the prediction
+	closure of every nonterminal (the rules predicted by it directly or through the first non-nullable symbol of a predicted
+	rule), so a prediction is a single bulk insert.
+
+	With a cache_dir the tables are stored in <cache_dir>/<fingerprint>.json and loaded from there by later processes.
+	Where that file cannot be read or written, the tables are computed as without a cache_dir.
+	Rule functions are not part of the tables, so the Grammar itself is still needed.'''
+	version = 2
+
+	def __init__(self, grammar, cache_dir=None):
+		self.grammar = grammar
+		self.rules = [r for rules in grammar.terms.values() for r in rules]
+		self.fingerprint = self.compute_fingerprint(self.rules)
+		tables = None
+		path = None
+		if cache_dir is not None:
+			path = os.path.join(cache_dir, self.fingerprint + ".json")
+			try:
+				with open(path) as f:
+					tables = json.load(f)
+			except (OSError, ValueError):
+				tables = None
+		if tables is None:
+			tables = self.compute_tables()
+			if path is not None:
+				self.store_tables(tables, path)
+		self.load_tables(tables)
+
+	@staticmethod
+	def store_tables(tables, path):
+		'''Writes the tables to the cache file `path`. The cache only saves time, so if it cannot be written (a missing or
+		read-only cache_dir, a full disk) it is left as it was, without a partly written temporary file.'''
+		tmp = "{}.{:d}.tmp".format(path, os.getpid())
+		try:
+			with open(tmp, "w") as f:
+				json.dump(tables, f)
+			os.replace(tmp, path)
+		except OSError:
+			try:
+				os.remove(tmp)
+			except OSError:
+				pass
+
+	@classmethod
+	def compute_fingerprint(cls, rules):
+		h = hashlib.sha256(repr(cls.version).encode())
+		for r in rules:
+			h.update(repr((r.lhs, tuple(r.rhs))).encode())
+		return h.hexdigest()
+
+	def compute_tables(self):
+		terms = self.grammar.terms
+		symbols = list(terms)
+		ids = {s: i for i, s in enumerate(symbols)}
+		for r in self.rules:
+			for t in r.rhs:
+				if t not in ids:
+					ids[t] = len(symbols)
+					symbols.append(t)
+
+		nullable = set()
+		changed = True
+		while changed:
+			changed = False
+			for r in self.rules:
+				if r.lhs not in nullable and all(t in nullable for t in r.rhs):
+					nullable.add(r.lhs)
+					changed = True
+
+		first = {nt: set() for nt in terms}
+		changed = True
+		while changed:
+			changed = False
+			for r in self.rules:
+				f = first[r.lhs]
+				n = len(f)
+				for t in r.rhs:
+					if t in terms:
+						f.update(first[t])
+					else:
+						f.add(t)
+					if t not in nullable:
+						break
+				changed = changed or len(f) != n
+
+		rule_ids = {id(r): n for n, r in enumerate(self.rules)}
+		closure = {}
+		for nt in terms:
+			reached = [nt]
+			seen = {nt}
+			for s in reached:  # grows while iterating, breadth first like the chart itself
+				for r in terms[s]:
+					for t in r.rhs:
+						if t in terms and t not in seen:
+							seen.add(t)
+							reached.append(t)
+						if t not in nullable:
+							break
+			closure[ids[nt]] = [[ids[s] for s in reached], [rule_ids[id(r)] for s in reached for r in terms[s]]]
+
+		return {
+			'fingerprint': self.fingerprint,
+			'symbols': symbols,
+			'nonterminals': len(terms),
+			'nullable': sorted(ids[s] for s in nullable),
+			'first': [sorted(ids[t] for t in first[nt]) for nt in terms],
+			'closure': [closure[i] for i in range(len(terms))],
+		}
+
+	def load_tables(self, tables):
+		self.symbols = [intern(s) if isinstance(s, str) else s for s in tables['symbols']]
+		self.symbol_ids = {s: i for i, s in enumerate(self.symbols)}
+		self.nonterminals = frozenset(self.symbols[:tables['nonterminals']])
+		self.terminals = frozenset(self.symbols[tables['nonterminals']:])
+		self.nullable = frozenset(self.symbols[i] for i in tables['nullable'])
+		self.closure = {}
+		self.closure_symbols = {}
+		for i, (syms, rules) in enumerate(tables['closure']):
+			self.closure[self.symbols[i]] = [self.rules[r].items[0] for r in rules]
+			self.closure_symbols[self.symbols[i]] = [self.symbols[s] for s in syms]
+		self.first = {self.symbols[i]: frozenset(self.symbols[t] for t in f) for i, f in enumerate(tables['first'])}
+		self.null_edges = self.build_null_edges()
+		self.rule_first = {}
+		for r in self.rules:
+			self.rule_first[r.items[0]] = self.sequence_first(r.rhs)
+		self.lookahead_closures = {}
+		self.start_items = {}
+
+	def start_item(self, start_nonterminal):
+		'''The initial item of the rule the recognizer starts from, which derives `start_nonterminal` and has the lhs None.
+		Made once per start nonterminal, so recognizing over and over does not number new items.'''
+		item = self.start_items.get(start_nonterminal)
+		if item is None:
+			item = self.start_items[start_nonterminal] = Rule(None, [start_nonterminal], identity).items[0]
+		return item
+
+	def sequence_first(self, symbols):
+		'''The terminals a string derived from `symbols` can start with, or None if it can be empty.'''
+		f = set()
+		for t in symbols:
+			if t in self.first:
+				f.update(self.first[t])
+			else:
+				f.add(t)
+			if t not in self.nullable:
+				return frozenset(f)
+		return None
+
+	def lookahead_closure(self, terminal):
+		'''Like `closure`, but only with the rules that can start with `terminal` or derive the empty string. `terminal` may
+		also be None for the end of the input. The lists are built on first use.'''
+		table = self.lookahead_closures.get(terminal)
+		if table is None:
+			table = self.lookahead_closures[terminal] = {}
+		return table
+
+	def filter_closure(self, nt, terminal):
+		items = [i for i in self.closure[nt] if self.rule_first[i] is None or terminal in self.rule_first[i]]
+		self.lookahead_closures[terminal][nt] = items
+		return items
+
+	def build_null_edges(self):
+		'''Builds one complete edge tree deriving the empty string for every nullable nonterminal, preferring epsilon rules.
+		The recognizer uses these as the `completing` edge when it moves a dot over a nullable symbol.'''
+		null_edges = {}
+		for r in self.rules:
+			if len(r.rhs) == 0 and r.lhs not in null_edges:
+				null_edges[r.lhs] = NullEdge(r.items[0], 0)
+		changed = True
+		while changed:
+			changed = False
+			for r in self.rules:
+				if r.lhs not in null_edges and all(t in null_edges for t in r.rhs):
+					e = Edge(r.items[0], 0)
+					for t in r.rhs:
+						e = NullEdge(e.item.advance, 0, e, null_edges[t])
+					null_edges[r.lhs] = e
+					changed = True
+		return null_edges
+
+
 class Entry:
-	def __init__(self, name, regex=None, func=lambda *args: None):
+	def __init__(self, name, regex=None, func=no_value):
 		if regex is None:
 			regex = name
 		self.name = name
 		self.regex = re.compile(regex)
 		self.func = func
+		self.bytes_regex = None
+
+	def pattern(self, binary=False):
+		'''The compiled regex for str input or, with binary=True, for bytes-like input. The latter is compiled on first use
+		from the UTF-8 encoded pattern, so classes like \\w and \\d only match ASCII there.'''
+		if not binary:
+			return self.regex
+		if self.bytes_regex is None:
+			self.bytes_regex = re.compile(self.regex.pattern.encode('utf-8'), self.regex.flags & ~re.UNICODE)
+		return self.bytes_regex
+
+
+global_flags = re.compile(r"\(\?[aiLmsux]+\)")
 
 
 class Lexicon:
 	def __init__(self, entries):
 		self.entries = entries
+		self.combined = {}
 
 	def __iter__(self):
 		return self.entries.__iter__()
 
+	def combine(self, binary=False):
+		'''Compile all entries into one regex with a named alternative per entry, in priority order.
+		Returns the regex and a dict from group name to entry. Entries must not use numbered backreferences.
+		The flags of each entry, including global ones like (?i) at the start of its pattern, apply to its alternative only.
+		The regex is None if the entries cannot be combined, e.g. because several of them define the same group name;
+		the Scanner then matches the entries one by one. With binary=True the regex is for bytes-like input, see Entry.pattern.'''
+		if binary not in self.combined:
+			alternatives = []
+			groups = {}
+			for n, e in enumerate(self.entries):
+				name = "_e{:d}".format(n)
+				flags = "".join(c for f, c in ((re.ASCII, "a"), (re.IGNORECASE, "i"), (re.MULTILINE, "m"), (re.DOTALL, "s"), (re.VERBOSE, "x")) if e.regex.flags & f)
+				pattern = e.regex.pattern
+				m = global_flags.match(pattern)
+				while m:  # already in e.regex.flags, and not allowed in the middle of a regex
+					pattern = pattern[m.end():]
+					m = global_flags.match(pattern)
+				if flags:
+					# in verbose mode a comment would run on into the closing parenthesis without the line break
+					pattern = "(?{}:{}{})".format(flags, pattern, "\n" if e.regex.flags & re.VERBOSE else "")
+				alternatives.append("(?P<{}>{})".format(name, pattern))
+				groups[name] = e
+			pattern = "|".join(alternatives)
+			try:
+				regex = re.compile(pattern.encode('utf-8') if binary else pattern)
+			except re.error:
+				regex = None
+			self.combined[binary] = (regex, groups)
+		return self.combined[binary]
+
 
 class Token:
-	def __init__(self, name, text, value):
+	'''A terminal symbol of the input. `pos` is where its text starts in the input, if it came from a Scanner.'''
+	__slots__ = ('name', 'text', 'value', 'pos')
+
+	def __init__(self, name, text, value, pos=None):
 		self.name = name
 		self.value = value
 		self.text = text
+		self.pos = pos
 
 	def __repr__(self):
 		return "Token{{{} = {!r}}}".format(self.name or "", self.text)
 
 
+class ParseError(ValueError):
+	'''Raised when the input is not in the language of the grammar.
+
+	`index` is the number of the offending token (the number of tokens if the input ended too early), `token` that token (None
+	at the end of the input or if the scanner found no token), `pos` its position in the input if known, and `expected` the
+	set of terminal names that would have been accepted there. `chart` is the chart up to the error, unless the Recognizer was
+	created with keep_chart=False. It is only rendered by dump(), which takes time proportional to its size.'''
+	def __init__(self, message, index=None, token=None, pos=None, expected=(), chart=None):
+		ValueError.__init__(self, message)
+		self.index = index
+		self.token = token
+		self.pos = pos
+		self.expected = frozenset(expected)
+		self.chart = chart
+
+	def dump(self):
+		'''All chart sets up to the error with their edges, or None if the chart was not kept.'''
+		if self.chart is None:
+			return None
+		return self.chart.errrepr(self.chart.tokens)
+
+	def __reduce__(self):
+		# the chart is left behind, it is big and refers to the rule functions
+		return (type(self), (self.args[0], self.index, self.token, self.pos, self.expected))
+
+
+class LimitError(ParseError):
+	'''Raised when recognition exceeds one of its Limits. `limit` is the name of the limit and `value` its value; `index`,
+	`token` and `pos` tell how far recognition got (as for ParseError), and `edges` how many edges the chart had by then.'''
+	def __init__(self, message, limit, value, index=None, token=None, pos=None, edges=0, chart=None):
+		ParseError.__init__(self, message, index, token, pos, (), chart)
+		self.limit = limit
+		self.value = value
+		self.edges = edges
+
+	def __reduce__(self):
+		return (type(self), (self.args[0], self.limit, self.value, self.index, self.token, self.pos, self.edges))
+
+
+def describe_expected(expected):
+	if not expected:
+		return "the end of the input"
+	return "one of " + ", ".join(sorted(map(str, expected)))
+
+
+buffer_types = (str, bytes, bytearray, memoryview, mmap.mmap)  # scanned in place, never read() from
+
+
 class Scanner:
-	def __init__(self, lexicon):
-		self.lexicon = lexicon
+	'''Splits input into tokens. By default each lexicon entry is tried in turn at every position.
+	With combined=True the lexicon is compiled into a single regex (see Lexicon.combine), so each token takes one match.
 
-	def scan(self, inp):
-		pos = 0
+	The input may be a str, a bytes-like object such as bytes or an mmap (matched with the bytes regexes of the entries, see
+	Entry.pattern; token texts are then bytes), or a file object, text or binary, which is read `chunk_size` characters
+	at a time.'''
+	def __init__(self, lexicon, combined=False, stats=None, chunk_size=1 << 16):
+		self.lexicon = lexicon
+		self.combined = combined
+		self.stats = stats
+		self.chunk_size = chunk_size
+
+	def scan(self, inp, pos=0):
+		'''Yields the tokens of `inp`, starting at position `pos`. For a file object, reading starts at its current position,
+		and `pos` is the position reported for that.'''
+		if not isinstance(inp, buffer_types) and hasattr(inp, 'read'):  # an mmap has read() too
+			tokens = self.scan_file(inp, pos)
+		elif self.combined:
+			tokens = self.scan_combined(inp, pos)
+		else:
+			tokens = self.scan_entries(inp, pos)
+		if self.stats is not None:
+			return self.stats.timed_scan(tokens)
+		return tokens
+
+	def scan_entries(self, inp, pos=0):
+		binary = not isinstance(inp, str)
+		entries = [(e.pattern(binary), e) for e in self.lexicon]
 		while pos < len(inp):
 			pos_start = pos
-			for e in self.lexicon:
-				m = e.regex.match(inp, pos)
-				if m and pos == m.start():
+			for regex, e in entries:
+				m = regex.match(inp, pos)
+				if m:
 					if e.name is not None:
-						yield Token(e.name, m.group(), e.func(m))
+						yield Token(e.name, m.group(), e.func(m), pos)
 					pos = m.end()
 					break
 			if pos == pos_start:
-				raise ValueError("No token recognized at pos={:d} ({})".format(pos, hilight_excerpt(inp, pos)))
+				raise ParseError("No token recognized at pos={:d} ({})".format(pos, hilight_excerpt(inp, pos)), pos=pos)
+
+	def scan_combined(self, inp, pos=0):
+		binary = not isinstance(inp, str)
+		regex, groups = self.lexicon.combine(binary)
+		if regex is None:
+			yield from self.scan_entries(inp, pos)
+			return
+		while pos < len(inp):
+			m = regex.match(inp, pos)
+			if not m or m.end() == pos:
+				raise ParseError("No token recognized at pos={:d} ({})".format(pos, hilight_excerpt(inp, pos)), pos=pos)
+			e = groups[m.lastgroup]
+			if e.name is not None:
+				if e.regex.groups:  # entry funcs expect their own group numbering
+					m = e.pattern(binary).match(inp, pos)
+				yield Token(e.name, m.group(), e.func(m), pos)
+			pos = m.end()
+
+	def matcher(self, binary):
+		'''A function match(inp, pos) returning the entry matching at pos and its match object, or None.'''
+		regex, groups = self.lexicon.combine(binary) if self.combined else (None, None)
+		if regex is not None:
+			def match(inp, pos):
+				m = regex.match(inp, pos)
+				if not m:
+					return None
+				e = groups[m.lastgroup]
+				if e.regex.groups:
+					m = e.pattern(binary).match(inp, pos)
+				return e, m
+		else:
+			entries = [(e.pattern(binary), e) for e in self.lexicon]
+
+			def match(inp, pos):
+				for regex, e in entries:
+					m = regex.match(inp, pos)
+					if m:
+						return e, m
+				return None
+		return match
+
+	def scan_file(self, f, offset=0):
+		'''Scans a file object chunk by chunk. A match is only accepted with at least chunk_size characters after it in the
+		buffer (or at the end of the file), otherwise it is retried with the next chunk read, so tokens spanning chunks are
+		found as in the whole text as long as no regex looks further ahead than that. Where nothing matches yet, reading goes
+		on until something does or the file ends, so a token longer than a chunk is found even if its regex only matches once
+		it has seen the end of the token, like a quoted string. The buffer holds about two chunks, or the longest token plus
+		a chunk; before a ParseError, everything from the unrecognized position to the end of the file.
+		Match objects passed to entry funcs are relative to the buffer, not to the file.'''
+		size = self.chunk_size
+		buf = f.read(size)
+		match = self.matcher(not isinstance(buf, str))
+		eof = not buf
+		pos = 0
+		while True:
+			if eof or len(buf) - pos >= size:
+				if pos >= len(buf):
+					return
+				found = match(buf, pos)
+				if found is not None and found[1].end() == pos:
+					found = None
+				if found is None and eof:
+					raise ParseError("No token recognized at pos={:d} ({})".format(offset + pos, hilight_excerpt(buf, pos)), pos=offset + pos)
+				if eof or found is not None and len(buf) - found[1].end() >= size:
+					e, m = found
+					if e.name is not None:
+						yield Token(e.name, m.group(), e.func(m), offset + pos)
+					pos = m.end()
+					continue
+			more = f.read(size)  # no match yet, not enough lookahead, or the token may go on in the next chunk
+			if more:
+				buf = buf[pos:] + more
+				offset += pos
+				pos = 0
+			else:
+				eof = True
 
 
 def hilight_excerpt(s, pos):
-	return repr(s[pos - 10:pos])[1:-1] + '\033[1;31m>\033[0;0m' + repr(s[pos:pos + 10])[1:-1]
+	before, after = s[max(0, pos - 10):pos], s[pos:pos + 10]
+	if not isinstance(s, str):
+		before, after = bytes(before).decode('utf-8', 'replace'), bytes(after).decode('utf-8', 'replace')
+	return repr(before)[1:-1] + '\033[1;31m>\033[0;0m' + repr(after)[1:-1]
 
 
 class EdgeSet:
+	'''An ordered set of edges. Edges may be added while the set is being iterated over, and will be visited by that iteration.
+	Duplicates are detected through a hash index on (item, start).
+	Incomplete edges are also indexed by the symbol they expect next, see waiting_on.'''
 	def __init__(self):
 		self.content = []
+		self.index = {}
+		self.waiting = {}
+		self.predicted = set()
+		self.leo = {}
 		self.count = 0
+		self.duplicates = 0
 
 	def add(self, i):
-		try:
-			return self.content[self.content.index(i)]
-		except ValueError:
-			pass
+		key = (i.start, i.item.number)
+		existing = self.index.get(key)
+		if existing is not None:
+			self.duplicates += 1
+			return existing
+		self.index[key] = i
 		self.content.append(i)
+		nxt = i.item.next
+		if nxt is not None:
+			waiting = self.waiting.get(nxt)
+			if waiting is None:
+				self.waiting[nxt] = [i]
+			else:
+				waiting.append(i)
 		self.count += 1
 		return i
 
+	def trim(self, nonterminals):
+		'''Keeps only what completing into this closed set needs: the edges waiting on nonterminals, and the Leo memo.
+		The other edges are only kept alive by derivations that refer to them.'''
+		self.waiting = {sym: edges for sym, edges in self.waiting.items() if sym in nonterminals}
+		self.content = []
+		self.index = {}
+		self.predicted = set()
+		self.count = 0
+
+	def waiting_on(self, symbol):
+		'''The edges in this set whose next symbol is `symbol`, in the order they were added.
+		Like iteration over the set itself, this list grows when matching edges are added.'''
+		return self.waiting.get(symbol, ())
+
 	def __delitem__(self, idx):
 		if idx >= self.count:
 			raise IndexError
+		i = self.content[idx]
+		del self.index[i.key()]
+		if not i.complete():
+			self.waiting[i.next()].remove(i)
 		del self.content[idx]
 		self.count -= 1
 
+	def __contains__(self, i):
+		return i.key() in self.index
+
 	def __getitem__(self, idx):
 		return self.content[idx]
 
@@ -132,28 +612,42 @@ class EdgeSet:
 		return self.count
 
 	def __repr__(self):
-		return "EdgeSet{{}}".format(", ".join([repr(x) for x in self.content]))
+		return "EdgeSet{{{}}}".format(", ".join([repr(x) for x in self.content]))
 
 
 class Edge:
-	def __init__(self, rule, dot, start, previous=None, completing=None):
-		self.rule = rule
-		self.dot = dot
+	'''An Earley item: `item` is the dotted rule, `start` the chart set it started in. `previous` is the edge before the dot was
+	moved over the last symbol, `completing` the Token or Edge that symbol was matched with.'''
+	__slots__ = ('item', 'start', 'previous', 'completing')
+
+	def __init__(self, item, start, previous=None, completing=None):
+		self.item = item
 		self.start = start
 		self.previous = previous
 		self.completing = completing
 
+	@property
+	def rule(self):
+		return self.item.rule
+
+	@property
+	def dot(self):
+		return self.item.dot
+
 	def complete(self):
-		return self.dot >= len(self.rule.rhs)
+		return self.item.complete
 
 	def next(self):
-		return self.rule.rhs[self.dot]
+		return self.item.next
 
 	def prev(self):
-		if self.dot > 0:
-			return self.rule.rhs[self.dot - 1]
+		if self.item.dot > 0:
+			return self.item.rule.rhs[self.item.dot - 1]
 		return None
 
+	def key(self):
+		return (self.start, self.item.number)
+
 	def __repr__(self):
 		return "({} ::= {} @ {})".format(self.rule.lhs or "", " ".join(list(self.rule.rhs[:self.dot]) + ["."] + list(self.rule.rhs[self.dot:])), str(self.start))
 
@@ -161,93 +655,542 @@ class Edge:
 		return self.dot == other.dot and self.start == other.start and self.rule == other.rule
 
 
+class NullEdge(Edge):
+	'''An edge of a prebuilt empty derivation (see CompiledGrammar.null_edges). These are shared between chart positions,
+	so their `start` carries no meaning.'''
+	__slots__ = ()
+
+
+class ForestEdgeSet(EdgeSet):
+	'''An EdgeSet that keeps every derivation: when a duplicate of a stored edge is added, its (previous, completing) pair is
+	recorded in `packed` under the stored edge's key. Used by Recognizer(..., forest=True), see forest.py.'''
+	def __init__(self):
+		EdgeSet.__init__(self)
+		self.packed = {}
+
+	def add(self, i):
+		e = EdgeSet.add(self, i)
+		if e is not i and i.completing is not None:
+			self.packed.setdefault(e.key(), []).append((i.previous, i.completing))
+		return e
+
+
+class LeoItem:
+	'''Leo's transitive item for a symbol in a chart set. `waiting` is the only edge in the set expecting the symbol, and
+	moving its dot over the symbol completes it; `above` is the transitive item for its own lhs where its rule started, if any.
+	`top` is the topmost waiting edge on this deterministic reduction path.'''
+	__slots__ = ('waiting', 'above', 'top')
+
+	def __init__(self, waiting, above):
+		self.waiting = waiting
+		self.above = above
+		self.top = above.top if above is not None else waiting
+
+
+class LeoEdge(Edge):
+	'''Stands in for a complete edge that Leo's optimization did not add to the chart: the one completing the top of the
+	reduction path of `leo`, bottoming out in `bottom`. The path is materialized into plain edges on first access.'''
+	__slots__ = ('leo', 'bottom', 'edge')
+
+	def __init__(self, leo, bottom):
+		self.leo = leo
+		self.bottom = bottom
+		self.edge = None
+
+	def materialize(self):
+		if self.edge is None:
+			c = self.bottom
+			node = self.leo
+			while node.above is not None:
+				c = Edge(node.waiting.item.advance, node.waiting.start, node.waiting, c)
+				node = node.above
+			self.edge = c
+		return self.edge
+
+	item = property(lambda self: self.materialize().item)
+	start = property(lambda self: self.materialize().start)
+	previous = property(lambda self: self.materialize().previous)
+	completing = property(lambda self: self.materialize().completing)
+
+
 class Chart:
-	def __init__(self, length):
-		self.sets = [EdgeSet() for i in range(0, length)]
+	def __init__(self, length=0, set_class=EdgeSet):
+		self.set_class = set_class
+		self.sets = [set_class() for i in range(0, length)]
+		self.tokens = []
 
 	def __getitem__(self, i):
 		return self.sets[i]
 
+	def __len__(self):
+		return len(self.sets)
+
+	def append(self):
+		s = self.set_class()
+		self.sets.append(s)
+		return s
+
+	def release(self):
+		'''Drops all chart sets and tokens, so the edges can be freed even while the chart itself is still referenced.'''
+		self.sets = []
+		self.tokens = []
+
 	def errrepr(self, tokens):
-		return "\n".join(["{ @%d %r" % (i, tokens[i] if i < len(tokens) else None) + ("\n" + "\n".join(["\t" + repr(s) for s in sset]) + "\n" if len(sset) > 0 else "") + "}," for i, sset in enumerate(self.sets)])
+		return "\n".join(["{ @%d %r" % (i, tokens[i] if i < len(tokens) else None) + ("\n" + "\n".join(["\t" + repr(s) for s in sset]) + "\n" if sset is not None and len(sset) > 0 else "") + "}," for i, sset in enumerate(self.sets)])
+
+
+class Stats:
+	'''Counters and timings of a parse, filled in by the Scanner, Recognizer and Parser it is passed to as `stats`.
+	Nothing is counted while an edge is added; every chart set is tallied once it is closed, so without a Stats object the
+	only cost is a check per chart set.
+
+	`callback(event, data)`, if given, is called with event 'set' and a dict of the counts of every closed chart set, and with
+	event 'phase' and a dict with the phase name ('scan', 'recognize' or 'parse') and its wall time in seconds when a phase ends.
+	`times` holds the wall time of each phase that ran, also when it raised; a phase that did not run has no entry.
+	A Stats object can be passed to several parses; the counts add up.'''
+	def __init__(self, callback=None):
+		self.callback = callback
+		self.tokens = 0
+		self.sets = 0
+		self.edges = 0
+		self.set_sizes = []  # edge count of every closed chart set, in chart order
+		self.largest_set = 0
+		self.largest_set_index = None
+		self.predictions = 0
+		self.scans = 0
+		self.completions = 0
+		self.duplicates = 0
+		self.times = {}
+
+	def chart_set(self, index, sset):
+		'''Tallies a closed chart set. Edges without derivation are predictions, those over a token scans, the rest completions.'''
+		predictions = scans = 0
+		for e in sset.content:
+			c = e.completing
+			if c is None:
+				predictions += 1
+			elif isinstance(c, Token):
+				scans += 1
+		size = len(sset)
+		data = {
+			'index': index,
+			'edges': size,
+			'predictions': predictions,
+			'scans': scans,
+			'completions': size - predictions - scans,
+			'duplicates': sset.duplicates,
+		}
+		self.sets += 1
+		self.edges += size
+		self.set_sizes.append(size)
+		if size > self.largest_set:
+			self.largest_set = size
+			self.largest_set_index = index
+		self.predictions += data['predictions']
+		self.scans += data['scans']
+		self.completions += data['completions']
+		self.duplicates += data['duplicates']
+		if self.callback is not None:
+			self.callback('set', data)
+
+	def phase(self, name, seconds):
+		self.times[name] = self.times.get(name, 0.0) + seconds
+		if self.callback is not None:
+			self.callback('phase', {'phase': name, 'seconds': seconds})
+
+	def timed_scan(self, tokens):
+		'''Passes on the tokens of a Scanner.scan generator, counting them and the time spent producing them.'''
+		elapsed = 0.0
+		try:
+			while True:
+				t = perf_counter()
+				try:
+					token = next(tokens)
+				except StopIteration:
+					return
+				finally:
+					elapsed += perf_counter() - t
+				self.tokens += 1
+				yield token
+		finally:
+			self.phase('scan', elapsed)
+
+	def as_dict(self):
+		return {
+			'tokens': self.tokens,
+			'sets': self.sets,
+			'edges': self.edges,
+			'largest_set': self.largest_set,
+			'largest_set_index': self.largest_set_index,
+			'predictions': self.predictions,
+			'scans': self.scans,
+			'completions': self.completions,
+			'duplicates': self.duplicates,
+			'times': dict(self.times),
+		}
 
+	def __repr__(self):
+		return "Stats{{{}}}".format(", ".join("{}={!r}".format(k, v) for k, v in self.as_dict().items()))
 
-class Recognizer:
-	def __init__(self, grammar):
-		self.grammar = grammar
 
-	def recognize(self, tokens, start_nonterminal):
-		def predict(chart, state, j, grammar):
-			for r in grammar.get(state.next(), []):
-				chart[j].add(Edge(r, 0, j))
-
-		def scan(chart, state, j, tokens):
-			if j < len(tokens) and tokens[j].name == state.next():
-				chart[j + 1].add(Edge(state.rule, state.dot + 1, state.start, previous=state, completing=tokens[j]))
-
-		def complete(chart, state, j):
-			completed = state.rule.lhs
-			for e in chart[state.start]:
-				if not e.complete() and e.next() == state.rule.lhs:
-					chart[j].add(Edge(e.rule, e.dot + 1, e.start, e, state))
-
-		chart = Chart(len(tokens) + 1)
-		chart[0].add(Edge(Rule(None, [start_nonterminal], lambda r: r), 0, 0))
-
-		for i in range(0, len(tokens) + 1):
-			if len(chart[i]) == 0:
-				raise ValueError("Unexpected {!r} at token {:d} ({})".format(tokens[i - 1], i - 1, chart.errrepr(tokens)))
-			for state in chart[i]:
-				if not state.complete():
-					if state.next() in self.grammar:
-						predict(chart, state, i, self.grammar)
-					else:
-						scan(chart, state, i, tokens)
-				else:
-					complete(chart, state, i)
-		return chart
+class Limits:
+	'''Bounds on the work of a recognizer, each None for no limit: the total number of chart edges (`max_edges`), the number
+	of edges in a single chart set (`max_set_edges`), the number of tokens (`max_tokens`), and the wall time in seconds from
+	the start of recognition (`timeout`). The edge counts are checked as edges are added, the time every
+	StreamingRecognizer.check_interval edges and whenever a chart set is closed, and the tokens before each token.
+	A recognizer that exceeds a limit raises a LimitError, even halfway through a chart set.'''
+	def __init__(self, max_edges=None, max_set_edges=None, max_tokens=None, timeout=None):
+		self.max_edges = max_edges
+		self.max_set_edges = max_set_edges
+		self.max_tokens = max_tokens
+		self.timeout = timeout
 
 
-class Parser:
-	def __init__(self, grammar):
-		self.grammar = grammar
+class StreamingRecognizer:
+	'''Push-style Earley recognizer. The chart grows by one set per token passed to feed(), so tokens can come from a lazy
+	source, and an unexpected token is reported as soon as it is fed. finish() returns the chart for the Parser.
 
-	def parse(self, chart, tokens):
-		def build_children(st):
-			if st.completing is not None:
-				children = [build_node(st.completing)]
-			else:
-				return []
+	With leo=True (the default) completion uses Joop Leo's deterministic reduction paths, so right recursion is linear:
+	only the topmost edge of such a path is added, with a LeoEdge standing in for the edges in between.
+
+	Epsilon rules are handled as described by Aycock and Horspool: whenever the dot is in front of a nullable symbol, the
+	edge is also advanced over it right away, so completions of empty derivations never have to be looked for.
+
+	With forest=True every derivation is recorded in the chart (see ForestEdgeSet), not only the first one found for each
+	edge; forest.Forest reads them back. Empty derivations are always represented by CompiledGrammar.null_edges.
+
+	With a Stats object as `stats`, every chart set is tallied when it is closed, and the time spent in feed() and finish() is
+	reported as the 'recognize' phase.
+
+	With keep_chart=False, a ParseError raised by feed() does not refer to the chart, so the chart can be freed as soon as the
+	recognizer is.
+
+	With lookahead=True a chart set is closed once the next token is known, and prediction only adds the rules that can start
+	with that token or derive the empty string (see CompiledGrammar.lookahead_closure). This leaves out edges that could
+	never be advanced. The chart then only serves the given tokens: calling expected() closes the set without lookahead.
 
-			if st.previous is not None:
-				children = build_children(st.previous) + children
+	With prune=True memory is bounded by what can still contribute to a parse rather than by the length of the input: every
+	`prune_interval` tokens or so, the chart sets nothing can complete into anymore are replaced by None, and the older ones
+	that are kept are trimmed (see EdgeSet.trim). The edges of the derivations found so far stay reachable through their
+	back-pointers, so the Parser still works on the last set. Not possible with forest=True, which needs all sets.
 
-			return children
+	With a Limits object as `limits`, feed() and finish() raise a LimitError as soon as one of the limits is exceeded.'''
+	prune_interval = 256
+	check_interval = 1024  # edges added to a chart set (duplicates included) between checks of the timeout
 
-		def build_node(state):
-			if isinstance(state, Token):
-				return state.value
+	def __init__(self, grammar, start_nonterminal, leo=True, forest=False, stats=None, keep_chart=True, lookahead=False, prune=False, limits=None):
+		if prune and forest:
+			raise ValueError("A pruned chart cannot hold a parse forest.")
+		self.grammar = grammar
+		self.leo = leo
+		self.lookahead = lookahead
+		self.prune = prune
+		self.retained = []  # indices of the sets kept by the last pruning
+		self.pruned = 0  # sets before this one have been pruned or trimmed
+		self.stats = stats
+		self.keep_chart = keep_chart
+		self.elapsed = 0.0
+		self.limits = limits
+		self.edges = 0  # in the closed chart sets, only counted with limits
+		self.deadline = None
+		if limits is not None and limits.timeout is not None:
+			self.deadline = perf_counter() + limits.timeout
+		self.compiled = grammar if isinstance(grammar, CompiledGrammar) else grammar.compile()
+		self.chart = Chart(1, ForestEdgeSet if forest else EdgeSet)
+		self.closed = 0  # number of chart sets that have been fully predicted and completed
+		self.chart[0].add(Edge(self.compiled.start_item(start_nonterminal), 0))
+
+	def close(self, token=None, end=False):
+		'''Runs prediction and completion on the last chart set. `token` is the next token, if known, and end=True
+		tells that the input ends here; with the lookahead option either lets prediction skip rules.'''
+		j = len(self.chart) - 1
+		if self.closed > j:
+			return
+		closure = self.compiled.closure
+		predict = closure
+		lookahead = None
+		if self.lookahead and (token is not None or end):
+			lookahead = None if end else token.name
+			predict = self.compiled.lookahead_closure(lookahead)
+		null_edges = self.compiled.null_edges
+		chart = self.chart
+		sset = chart[j]
+		predicted = sset.predicted
+		check_at = maxsize if self.limits is None else self.next_check(sset)
+		for state in sset:
+			if sset.count + sset.duplicates > check_at:
+				check_at = self.check_progress(j, sset, token)
+			item = state.item
+			if not item.complete:
+				nxt = item.next
+				if nxt in closure:
+					if nxt not in predicted:
+						predicted.update(self.compiled.closure_symbols[nxt])
+						items = predict.get(nxt)
+						if items is None:
+							items = self.compiled.filter_closure(nxt, lookahead)
+						for i in items:
+							sset.add(Edge(i, j))
+							if sset.count + sset.duplicates > check_at:
+								check_at = self.check_progress(j, sset, token)
+					if nxt in null_edges:
+						sset.add(Edge(item.advance, state.start, state, null_edges[nxt]))
+			elif state.start < j:  # empty derivations were already skipped over above
+				if self.leo:
+					t = self.leo_item(state.start, item.rule.lhs)
+					if t is not None:
+						sset.add(Edge(t.top.item.advance, t.top.start, t.top, state if t.above is None else LeoEdge(t, state)))
+						continue
+				waiting = chart[state.start].waiting_on(item.rule.lhs)
+				k = 0
+				while k < len(waiting):
+					e = waiting[k]
+					sset.add(Edge(e.item.advance, e.start, e, state))
+					k += 1
+					if sset.count + sset.duplicates > check_at:
+						check_at = self.check_progress(j, sset, token)
+		if self.limits is not None:
+			self.check_progress(j, sset, token)
+			self.edges += len(sset)
+		self.closed = j + 1
+		if self.stats is not None:
+			self.stats.chart_set(j, sset)
+
+	def next_check(self, sset):
+		'''The number of edges added to `sset`, the chart set being closed, counting duplicates, above which
+		check_progress() is due: before the set can exceed an edge limit, and after check_interval more edges.'''
+		limits = self.limits
+		room = maxsize if self.deadline is None else self.check_interval
+		if limits.max_set_edges is not None:
+			room = min(room, limits.max_set_edges - sset.count)
+		if limits.max_edges is not None:
+			room = min(room, limits.max_edges - self.edges - sset.count)
+		return sset.count + sset.duplicates + room
+
+	def check_progress(self, j, sset, token):
+		'''Raises a LimitError if chart set j, which is being closed, exceeds a limit, or if the time is up. Otherwise returns
+		the size of the set at which to check again.'''
+		limits = self.limits
+		edges = self.edges + len(sset)
+		if limits.max_set_edges is not None and len(sset) > limits.max_set_edges:
+			self.exceeded('max_set_edges', limits.max_set_edges, j, token, edges)
+		if limits.max_edges is not None and edges > limits.max_edges:
+			self.exceeded('max_edges', limits.max_edges, j, token, edges)
+		if self.deadline is not None and perf_counter() > self.deadline:
+			self.exceeded('timeout', limits.timeout, j, token, edges)
+		return self.next_check(sset)
+
+	def exceeded(self, limit, value, j, token, edges=None):
+		if edges is None:
+			edges = self.edges
+		pos = token.pos if token is not None else None
+		at = "the end of the input" if token is None else "token {:d}{}".format(j, "" if pos is None else " (pos={:d})".format(pos))
+		msg = "Limit {}={!r} exceeded at {}, with {:d} edges in {:d} chart sets".format(limit, value, at, edges, len(self.chart))
+		raise LimitError(msg, limit, value, j, token, pos, edges, self.chart if self.keep_chart else None)
+
+	def leo_item(self, i, symbol):
+		'''The LeoItem for `symbol` in (closed) chart set i, or None if completing `symbol` there is not deterministic.'''
+		chart = self.chart
+		path = []
+		while True:
+			sset = chart[i]
+			if symbol in sset.leo:
+				t = sset.leo[symbol]
+				break
+			waiting = sset.waiting.get(symbol)
+			if waiting is None or len(waiting) != 1 or not waiting[0].item.advance.complete:
+				t = sset.leo[symbol] = None
+				break
+			path.append((sset, symbol, waiting[0]))
+			i, symbol = waiting[0].start, waiting[0].item.rule.lhs
+		for sset, symbol, w in reversed(path):
+			t = sset.leo[symbol] = LeoItem(w, t)
+		return t
+
+	def feed(self, token):
+		'''Advances the chart over one token. Raises ParseError if no edge can accept it, leaving the chart as it was.'''
+		if self.stats is None:
+			return self.shift(token)
+		t = perf_counter()
+		try:
+			self.shift(token)
+		except Exception:
+			self.elapsed += perf_counter() - t
+			self.stats.phase('recognize', self.elapsed)
+			raise
+		self.elapsed += perf_counter() - t
+
+	def shift(self, token):
+		chart = self.chart
+		j = len(chart) - 1
+		if self.limits is not None and self.limits.max_tokens is not None and j >= self.limits.max_tokens:
+			self.exceeded('max_tokens', self.limits.max_tokens, j, token)
+		self.close(token)
+		chart.tokens.append(token)
+		nxt = chart.append()
+		if token.name not in self.compiled.nonterminals:
+			check_at = maxsize if self.limits is None else self.next_check(nxt)
+			for e in chart[j].waiting_on(token.name):
+				nxt.add(Edge(e.item.advance, e.start, e, token))
+				if nxt.count > check_at:
+					check_at = self.check_progress(j, nxt, token)
+		if len(nxt) == 0:
+			chart.sets.pop()
+			chart.tokens.pop()
+			expected = expected_terminals(chart[j], self.compiled)
+			pos = "" if token.pos is None else " (pos={:d})".format(token.pos)
+			msg = "Unexpected {!r} at token {:d}{}, expected {}".format(token, j, pos, describe_expected(expected))
+			raise ParseError(msg, j, token, token.pos, expected, chart if self.keep_chart else None)
+		if self.prune and j - self.pruned >= max(self.prune_interval, len(self.retained)):
+			self.prune_chart()
+
+	def prune_chart(self):
+		'''Drops the chart sets before the last one that no edge can complete into anymore: only sets where a live edge
+		started are looked at again, and from those, the edges waiting on nonterminals can carry on.'''
+		chart = self.chart
+		last = len(chart) - 1
+		nonterminals = self.compiled.nonterminals
+		live = set()
+		stack = [e.start for e in chart[last].content]
+		while stack:
+			i = stack.pop()
+			if i in live or i == last:
+				continue
+			live.add(i)
+			for sym, edges in chart[i].waiting.items():
+				if sym in nonterminals:
+					stack.extend(e.start for e in edges)
+		retained = []
+		for i in self.retained:
+			if i in live:
+				retained.append(i)
 			else:
-				try:
-					ch = build_children(state)
-				except Exception as e:
-					raise ValueError("Failed to build node for {!r}".format(state)) from e
-				return state.rule.func(*ch)
+				chart.sets[i] = None
+		for i in range(self.pruned, last):
+			if i in live:
+				chart[i].trim(nonterminals)
+				retained.append(i)
+			else:
+				chart.sets[i] = None
+		self.retained = retained
+		self.pruned = last
+
+	def expected(self):
+		'''The set of terminal names that feed() would accept next.'''
+		self.close()
+		return expected_terminals(self.chart[-1], self.compiled)
+
+	def finish(self):
+		if self.stats is None:
+			self.close(end=True)
+			return self.chart
+		t = perf_counter()
+		try:
+			self.close(end=True)
+		finally:
+			self.stats.phase('recognize', self.elapsed + perf_counter() - t)
+		return self.chart
+
+
+def expected_terminals(sset, compiled):
+	'''The terminal names that edges of the (closed) chart set `sset` are waiting on, directly or as the start of a
+	nonterminal. Going by FIRST sets, this also holds when prediction was filtered by lookahead.'''
+	expected = set()
+	for sym, edges in sset.waiting.items():
+		if edges:
+			if sym in compiled.nonterminals:
+				expected.update(compiled.first[sym])
+			else:
+				expected.add(sym)
+	return expected
 
+
+class Recognizer:
+	def __init__(self, grammar, leo=True, forest=False, stats=None, keep_chart=True, lookahead=False, prune=False, limits=None):
+		self.grammar = grammar
+		self.leo = leo
+		self.forest = forest
+		self.stats = stats
+		self.keep_chart = keep_chart
+		self.lookahead = lookahead
+		self.prune = prune
+		self.limits = limits
+
+	def stream(self, start_nonterminal):
+		return StreamingRecognizer(self.grammar, start_nonterminal, self.leo, self.forest, self.stats, self.keep_chart, self.lookahead, self.prune, self.limits)
+
+	def recognize(self, tokens, start_nonterminal):
+		'''Builds the chart for `tokens`, which may be any iterable (e.g. a Scanner.scan generator).'''
+		s = self.stream(start_nonterminal)
+		for token in tokens:
+			s.feed(token)
+		return s.finish()
+
+
+class Parser:
+	def __init__(self, grammar, stats=None):
+		self.grammar = grammar
+		self.stats = stats
+
+	@staticmethod
+	def children(edge):
+		'''The Tokens and Edges matched by the right-hand side of `edge`, in order.'''
+		children = []
+		while edge is not None and edge.completing is not None:
+			children.append(edge.completing)
+			edge = edge.previous
+		children.reverse()
+		return children
+
+	def build(self, root):
+		'''Computes the value of the derivation rooted in `root`. Uses an explicit stack, so deep trees need no Python recursion.'''
+		children = self.children
+		stack = [(root, children(root), [])]
+		while True:
+			edge, ch, values = stack[-1]
+			if len(values) < len(ch):
+				c = ch[len(values)]
+				if isinstance(c, Token):
+					values.append(c.value)
+				else:
+					stack.append((c, children(c), []))
+				continue
+			try:
+				value = edge.rule.func(*values)
+			except Exception as e:
+				raise ValueError("Failed to build node for {!r}".format(edge)) from e
+			stack.pop()
+			if not stack:
+				return value
+			stack[-1][2].append(value)
+
+	def parse(self, chart, tokens, release=False):
+		'''The value of the first complete parse in `chart`. With release=True the chart is released (see Chart.release)
+		as soon as the root of that parse is found, so the edges are freed while the value is being built.'''
 		complete_parses = [s for s in chart[-1] if s.rule.lhs is None and s.complete()]
 		if len(complete_parses) == 0:
-			raise ValueError("No complete parses exist.")
-		return build_node(complete_parses[0])
-
+			expected = expected_terminals(chart[-1], self.grammar.compile())
+			raise ParseError("No complete parses exist: the input ends after {:d} tokens, expected {}.".format(len(tokens), describe_expected(expected)), len(tokens), expected=expected)
+		root = complete_parses[0]
+		if release:
+			chart.release()
+		if self.stats is None:
+			return self.build(root)
+		t = perf_counter()
+		try:
+			return self.build(root)
+		finally:
+			self.stats.phase('parse', perf_counter() - t)
 
-def parse(lexicon, grammar, start_nonterminal, input):
-	s = Scanner(lexicon)
-	tokens = list(s.scan(input))
 
-	r = Recognizer(grammar)
-	chart = r.recognize(tokens, start_nonterminal)
+def parse(lexicon, grammar, start_nonterminal, input, stats=None, limits=None):
+	'''Parses the string `input`. With a Stats object as `stats`, the counts and phase times of the parse are added to it.
+	With a Limits object as `limits`, recognition stops with a LimitError when it exceeds one of them.'''
+	s = Scanner(lexicon, stats=stats)
+	r = Recognizer(grammar, stats=stats, limits=limits)
+	chart = r.recognize(s.scan(input), start_nonterminal)
 
-	p = Parser(grammar)
-	tree = p.parse(chart, tokens)
+	p = Parser(grammar, stats)
+	tree = p.parse(chart, chart.tokens)
 
 	return tree
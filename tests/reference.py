@@ -0,0 +1,149 @@
+# Earley Parser in Python 3 - Reference recognizer for the tests
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# The recognizer and parser as they were before the chart was indexed and the recognizer rewritten: a list-based EdgeSet
+# with linear duplicate checks, an edge per rule and dot, prediction rule by rule, completion by scanning the whole start
+# set, and a recursive tree builder. Slow, but simple enough to compare the real thing with. It cannot handle epsilon rules,
+# which EpsilonGrammar used to expand away, see expand_epsilon().
+
+from itertools import chain
+
+from ..parser import Rule, Token
+from ..benchmark import suite_cases
+
+
+class ReferenceEdgeSet:
+	def __init__(self):
+		self.content = []
+
+	def add(self, i):
+		try:
+			return self.content[self.content.index(i)]
+		except ValueError:
+			pass
+		self.content.append(i)
+		return i
+
+	def __iter__(self):
+		i = 0
+		while i < len(self.content):
+			yield self.content[i]
+			i += 1
+
+	def __len__(self):
+		return len(self.content)
+
+
+class ReferenceEdge:
+	def __init__(self, rule, dot, start, previous=None, completing=None):
+		self.rule = rule
+		self.dot = dot
+		self.start = start
+		self.previous = previous
+		self.completing = completing
+
+	def complete(self):
+		return self.dot >= len(self.rule.rhs)
+
+	def next(self):
+		return self.rule.rhs[self.dot]
+
+	def __eq__(self, other):
+		return self.dot == other.dot and self.start == other.start and self.rule is other.rule
+
+
+class ReferenceError(ValueError):
+	def __init__(self, message, index):
+		ValueError.__init__(self, message)
+		self.index = index
+
+
+def recognize(grammar, tokens, start_nonterminal):
+	'''The chart as a list of ReferenceEdgeSets. Raises ReferenceError with the index of the first token no edge accepts.'''
+	chart = [ReferenceEdgeSet() for i in range(len(tokens) + 1)]
+	chart[0].add(ReferenceEdge(Rule(None, [start_nonterminal], lambda r: r), 0, 0))
+	for i in range(len(tokens) + 1):
+		if len(chart[i]) == 0:
+			raise ReferenceError("Unexpected {!r} at token {:d}".format(tokens[i - 1], i - 1), i - 1)
+		for state in chart[i]:
+			if not state.complete():
+				if state.next() in grammar:
+					for r in grammar.get(state.next(), []):
+						chart[i].add(ReferenceEdge(r, 0, i))
+				elif i < len(tokens) and tokens[i].name == state.next():
+					chart[i + 1].add(ReferenceEdge(state.rule, state.dot + 1, state.start, state, tokens[i]))
+			else:
+				for e in chart[state.start]:
+					if not e.complete() and e.next() == state.rule.lhs:
+						chart[i].add(ReferenceEdge(e.rule, e.dot + 1, e.start, e, state))
+	return chart
+
+
+def parse(chart, tokens):
+	'''The value of the first complete parse, built recursively. Raises ReferenceError with the number of tokens if there
+	is none.'''
+	def build_children(st):
+		if st.completing is None:
+			return []
+		children = [build_node(st.completing)]
+		if st.previous is not None:
+			children = build_children(st.previous) + children
+		return children
+
+	def build_node(state):
+		if isinstance(state, Token):
+			return state.value
+		return state.rule.func(*build_children(state))
+
+	complete_parses = [s for s in chart[-1] if s.rule.lhs is None and s.complete()]
+	if len(complete_parses) == 0:
+		raise ReferenceError("No complete parses exist.", len(tokens))
+	return build_node(complete_parses[0])
+
+
+def expand_epsilon(grammar):
+	'''The rules of the EpsilonGrammar `grammar` rewritten the way EpsilonGrammar used to: a variant of every rule for each
+	combination of its nullable symbols left out, with the values of the epsilon rules filled in, and without the epsilon
+	rules themselves.'''
+	def variants(terms):
+		if len(terms) == 0:
+			yield ()
+		else:
+			for v in variants(terms[1:]):
+				yield ((terms[0], True),) + v
+				if grammar.nullability.get(terms[0], False):
+					yield ((terms[0], False),) + v
+
+	def make_func(rule, variant):
+		def func(*args):
+			args = iter(args)
+			return rule.func(*[next(args) if kept else grammar.nully_rules[t].func() for t, kept in variant])
+		return func
+
+	return [Rule(rule.lhs, tuple(t for t, kept in variant if kept), make_func(rule, variant))
+		for rule in chain(*grammar.terms.values()) for variant in variants(rule.rhs) if len(variant) > 0]
+
+
+def edges(sset):
+	'''The edges of a chart set, reference or not, as a set of (rule, dot, start) with rules by identity; the start rule,
+	which differs between the two, as None.'''
+	return {(None if e.rule.lhs is None else id(e.rule), e.dot, e.start) for e in sset}
+
+
+def reference_cases():
+	'''The benchmark suite cases without epsilon rules, which the reference recognizer can handle.'''
+	return [case for case in suite_cases() if not case.grammar.compile().nullable]
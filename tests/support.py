@@ -0,0 +1,61 @@
+# Earley Parser in Python 3 - Test helpers
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import random
+
+from ..parser import Scanner, Recognizer, Parser, ParseError
+from ..benchmark import suite_cases
+
+
+def variants(tokens, n, rnd):
+	'''`tokens` and `n` copies with a random token deleted, inserted (one of `tokens`) or replaced, which are mostly invalid.'''
+	result = [tokens]
+	for k in range(n):
+		t = list(tokens)
+		op = rnd.random()
+		i = rnd.randrange(len(t) + 1)
+		if op < 0.4 and t:
+			del t[min(i, len(t) - 1)]
+		elif op < 0.7 and t:
+			t.insert(i, rnd.choice(tokens))
+		elif t:
+			t[min(i, len(t) - 1)] = rnd.choice(tokens)
+		result.append(t)
+	return result
+
+
+def case_inputs(sizes=(5, 20, 60), n=30, seed=0, cases=None):
+	'''(suite case, tokens) pairs of the benchmark suite cases (or of `cases`) at each size, with `n` variants each (see
+	variants()).'''
+	rnd = random.Random(seed)
+	for case in suite_cases() if cases is None else cases:
+		for size in sizes:
+			tokens = list(Scanner(case.lexicon).scan(case.text(size)))
+			for v in variants(tokens, n, rnd):
+				yield case, v
+
+
+def outcome(grammar, start, tokens, **options):
+	'''The value of parsing `tokens` with a Recognizer(grammar, **options), the index and expected terminals of the
+	ParseError, or the type of the error raised by a rule function (calc.py functions with wrong arguments, say).'''
+	try:
+		chart = Recognizer(grammar, **options).recognize(tokens, start)
+		return ('ok', Parser(grammar).parse(chart, chart.tokens))
+	except ParseError as e:
+		return ('error', e.index, sorted(e.expected))
+	except ValueError as e:
+		return ('failed', type(e.__cause__ or e).__name__)
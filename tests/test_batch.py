@@ -0,0 +1,87 @@
+# Earley Parser in Python 3 - Batch parsing tests
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from ..parser import Lexicon, Entry, Grammar, Rule, ParseError
+from ..batch import parse_many
+
+
+def factory():
+	lexicon = Lexicon([Entry('n', '[0-9]+', lambda m: int(m.group())), Entry('+', r'\+'), Entry(None, r'\s+')])
+	grammar = Grammar([
+		Rule('S', ('S', '+', 'n'), lambda s, p, n: s + n),
+		Rule('S', ('n',), lambda n: n),
+	])
+	return lexicon, grammar
+
+
+def failing_factory():
+	raise OSError("grammar not found")
+
+
+def inputs(n):
+	return ["{:d} + {:d}".format(i, i) if i % 7 else "{:d} +".format(i) for i in range(n)]
+
+
+class ParseManyTest(unittest.TestCase):
+	def check(self, results, n):
+		self.assertEqual([i for i, value, error in results], list(range(n)))
+		for i, value, error in results:
+			if i % 7:
+				self.assertEqual((value, error), (2 * i, None))
+			else:
+				self.assertIsNone(value)
+				self.assertIsInstance(error, ParseError)
+
+	def test_in_process(self):
+		self.check(list(parse_many(factory, 'S', inputs(50), workers=0)), 50)
+
+	def test_ordered(self):
+		self.check(list(parse_many(factory, 'S', inputs(500), workers=2, chunksize=8)), 500)
+
+	def test_unordered(self):
+		self.check(sorted(parse_many(factory, 'S', inputs(500), workers=2, chunksize=8, ordered=False)), 500)
+
+	def test_failing_factory(self):
+		for ordered in (True, False):
+			results = list(parse_many(failing_factory, 'S', inputs(50), workers=2, chunksize=8, ordered=ordered))
+			self.assertEqual(sorted(i for i, value, error in results), list(range(50)))
+			for i, value, error in results:
+				self.assertIsNone(value)
+				self.assertIsInstance(error, OSError)
+				self.assertEqual(str(error), "grammar not found")
+		with self.assertRaises(OSError):
+			list(parse_many(failing_factory, 'S', inputs(50), workers=0))
+
+	def test_backpressure(self):
+		read = []
+
+		def source():
+			for i, text in enumerate(inputs(10000)):
+				read.append(i)
+				yield text
+		for ordered in (True, False):
+			del read[:]
+			results = parse_many(factory, 'S', source(), workers=2, chunksize=8, ordered=ordered, window=3)
+			next(results)
+			self.assertLessEqual(len(read), 2 * 3 * 8)
+			results.close()
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,93 @@
+# Earley Parser in Python 3 - Calculator tests
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import unittest
+
+from ..parser import ParseError, parse
+from ..calc import Calculator, math_lexicon, math_grammar, run
+
+
+def uncached(line):
+	try:
+		return parse(math_lexicon, math_grammar, 'expression', line)
+	except Exception as e:
+		return type(e)
+
+
+def evaluate(calculator, line):
+	try:
+		return calculator.evaluate(line)
+	except Exception as e:
+		return type(e)
+
+
+lines = ["1+2*3", "2^10", "sqrt(16) + rt(27, 3)", "1+*3", "(1", "1/0", "undefined", "-PI", "max(1,2)", "1 + 2 * 3", "1.0+2*3.00"]
+
+
+class CalculatorTest(unittest.TestCase):
+	def test_same_as_uncached(self):
+		'''Results and errors are the same as evaluating without the cache, the first time and from the cache.'''
+		for cache_size in (0, 3, 1024):
+			c = Calculator(cache_size)
+			for k in range(3):
+				for line in lines:
+					self.assertEqual(evaluate(c, line), uncached(line), (cache_size, line))
+
+	def test_hits(self):
+		c = Calculator()
+		self.assertEqual(c.evaluate("1+2"), 3.0)
+		self.assertEqual((c.hits, c.misses), (0, 1))
+		self.assertEqual(c.evaluate(" 1 + 2.0"), 3.0)  # same tokens
+		self.assertEqual((c.hits, c.misses), (1, 1))
+		for k in range(2):
+			with self.assertRaises(ParseError) as cm:
+				c.evaluate("1+*3")
+			self.assertEqual(cm.exception.index, 2)
+			self.assertIsNone(cm.exception.chart)
+		self.assertEqual((c.hits, c.misses), (2, 2))
+		self.assertEqual(c.stats(), "2 hits, 2 misses, 2 cached")
+
+	def test_eviction(self):
+		'''The least recently used entry goes first.'''
+		c = Calculator(2)
+		c.evaluate("1")
+		c.evaluate("2")
+		c.evaluate("1")  # 2 is now the least recently used
+		c.evaluate("3")
+		self.assertEqual(len(c.cache), 2)
+		self.assertEqual((c.hits, c.misses), (1, 3))
+		c.evaluate("1")
+		self.assertEqual((c.hits, c.misses), (2, 3))
+		c.evaluate("2")
+		self.assertEqual((c.hits, c.misses), (2, 4))
+
+	def test_no_cache(self):
+		c = Calculator(0)
+		c.evaluate("1")
+		c.evaluate("1")
+		self.assertEqual((c.hits, c.misses, len(c.cache)), (0, 2, 0))
+
+	def test_run(self):
+		for buffer_lines in (1, 2, 100):
+			out = io.StringIO()
+			run(["1+1", "1+", "2*3"], out, Calculator(), buffer_lines)
+			self.assertEqual(out.getvalue(), "2.0\nError\n6.0\n")
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,111 @@
+# Earley Parser in Python 3 - Generated parser tests
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import importlib.util
+import os
+import random
+import tempfile
+import unittest
+
+from ..parser import Grammar, Rule, Token, Scanner, Recognizer, Parser, ParseError
+from ..benchmark import suite_cases
+from ..codegen import generate, rule_actions, importable
+
+
+def load(grammar, start, directory, name):
+	path = os.path.join(directory, name + ".py")
+	with open(path, "w") as f:
+		f.write(generate(grammar, [start]))
+	spec = importlib.util.spec_from_file_location(name, path)
+	module = importlib.util.module_from_spec(spec)
+	spec.loader.exec_module(module)
+	return module
+
+
+def derivations(grammar):
+	'''A copy of `grammar` whose rule functions return the number of their rule and their arguments, so values tell the
+	derivations apart.'''
+	rules = grammar.compile().rules
+	return Grammar([Rule(r.lhs, r.rhs, (lambda n: lambda *args: (n, args))(k)) for k, r in enumerate(rules)])
+
+
+def outcome(func):
+	try:
+		return ('ok', func())
+	except ParseError as e:
+		return ('error', str(e), e.index, sorted(e.expected))
+
+
+def pair(a, b):
+	return (a, b)
+
+
+class Tagger:
+	def __init__(self, tag):
+		self.tag = tag
+
+	def pair(self, a, b):
+		return (self.tag, a, b)
+
+
+class CodegenTest(unittest.TestCase):
+	def test_same_derivations(self):
+		'''Generated modules find the same derivations and raise the same errors as Recognizer and Parser.'''
+		rnd = random.Random(3)
+		with tempfile.TemporaryDirectory() as d:
+			for n, case in enumerate(suite_cases()):
+				grammar = derivations(case.grammar)
+				module = load(grammar, case.start, d, "generated{:d}".format(n))
+				actions = rule_actions(grammar)
+				for size in (1, 5, 20, 60):
+					tokens = list(Scanner(case.lexicon).scan(case.text(size)))
+					for k in range(20):
+						t = list(tokens)
+						for i in range(rnd.randrange(3) if k else 0):
+							t.insert(rnd.randrange(len(t) + 1), rnd.choice(tokens))
+
+						def interpreted():
+							chart = Recognizer(grammar).recognize(t, case.start)
+							return Parser(grammar).parse(chart, chart.tokens)
+						self.assertEqual(outcome(lambda: module.parse(t, actions=actions)), outcome(interpreted), (case.name, [x.name for x in t]))
+
+	def test_imported_actions(self):
+		grammar = Grammar([Rule('P', ('x', 'y'), pair), Rule('L', ('P', 'L'), pair), Rule('L', (), lambda: None)])
+		tokens = [Token(c, c, c) for c in "xyxy"]
+		with tempfile.TemporaryDirectory() as d:
+			module = load(grammar, 'L', d, "imported")
+			self.assertEqual(module.MISSING, (2,))
+			with self.assertRaises(ValueError):
+				module.parse(tokens, 'L')
+			self.assertEqual(module.parse(tokens, 'L', rule_actions(grammar)), (('x', 'y'), (('x', 'y'), None)))
+
+
+	def test_bound_method_actions(self):
+		'''Bound methods are not imported (that would lose their instance), but builtins are.'''
+		tagger = Tagger('t')
+		grammar = Grammar([Rule('P', ('x', 'y'), tagger.pair), Rule('L', ('P', 'P'), max)])
+		self.assertIsNone(importable(tagger.pair))
+		self.assertEqual(importable(max), ('builtins', 'max'))
+		tokens = [Token(c, c, c) for c in "xyxy"]
+		with tempfile.TemporaryDirectory() as d:
+			module = load(grammar, 'L', d, "bound")
+			self.assertEqual(module.MISSING, (0,))
+			self.assertEqual(module.parse(tokens, 'L', rule_actions(grammar)), ('t', 'x', 'y'))
+
+
+if __name__ == '__main__':
+	unittest.main()
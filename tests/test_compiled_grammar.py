@@ -0,0 +1,66 @@
+# Earley Parser in Python 3 - CompiledGrammar tests
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import tempfile
+import unittest
+
+from ..parser import Grammar, Rule, Token, Recognizer, Parser
+
+
+def grammar():
+	return Grammar([
+		Rule('L', ('L', ',', 'x'), lambda l, c, x: l + 1),
+		Rule('L', ('x',), lambda x: 1),
+	])
+
+
+def count_items(g):
+	tokens = [Token(c, c, c) for c in "x,x,x"]
+	return Parser(g).parse(Recognizer(g).recognize(tokens, 'L'), tokens)
+
+
+class CacheTest(unittest.TestCase):
+	def test_cache_file(self):
+		with tempfile.TemporaryDirectory() as d:
+			g = grammar()
+			g.compile(d)
+			self.assertEqual(os.listdir(d), [g.compiled.fingerprint + ".json"])
+			g = grammar()
+			g.compile(d)
+			self.assertEqual(count_items(g), 3)
+
+	def test_missing_cache_dir(self):
+		with tempfile.TemporaryDirectory() as d:
+			g = grammar()
+			g.compile(os.path.join(d, "missing"))
+			self.assertEqual(count_items(g), 3)
+			self.assertEqual(os.listdir(d), [])
+
+	def test_failed_write(self):
+		with tempfile.TemporaryDirectory() as d:
+			# a directory where the cache file should go makes the final rename fail after the tables were written
+			fingerprint = grammar().compile().fingerprint
+			os.mkdir(os.path.join(d, fingerprint + ".json"))
+			g = grammar()
+			g.compile(d)
+			self.assertEqual(count_items(g), 3)
+			self.assertEqual(os.listdir(d), [fingerprint + ".json"])
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,111 @@
+# Earley Parser in Python 3 - ComplexGrammar tests
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pickle
+import random
+import unittest
+
+from ..parser import Lexicon, Entry, ParseError, parse
+from ..complex_grammar import ComplexGrammar, RhsParser, Regroup, regroup
+
+
+class RhsParserTest(unittest.TestCase):
+	def test_same_as_grammar(self):
+		'''RhsParser accepts the same right-hand sides as ComplexGrammar.gr_grammar, with the same terms, and rejects the
+		others with a ParseError.'''
+		rnd = random.Random(6)
+		pieces = ['a', 'b', 'c_1', '|', '[', ']', '{', '}', ':', '(', ')', ' ', '  ', '+']
+		accepted = 0
+		for n in range(20000):
+			text = "".join(rnd.choice(pieces) + rnd.choice(['', ' ']) for i in range(rnd.randrange(1, 9)))
+			if not text.strip():
+				continue  # RhsParser reads an empty right-hand side as the empty term
+			try:
+				expected = ('ok', parse(ComplexGrammar.gr_tokens, ComplexGrammar.gr_grammar, 'term', text))
+			except ParseError:
+				expected = ('error',)
+			try:
+				got = ('ok', RhsParser(text).parse())
+			except ParseError:
+				got = ('error',)
+			self.assertEqual(got, expected, text)
+			accepted += expected[0] == 'ok'
+		self.assertGreater(accepted, 1000)
+
+
+class ComplexGrammarTest(unittest.TestCase):
+	lexicon = Lexicon([Entry(c, c, lambda m: m.group()) for c in "ABCD"] + [Entry(None, r"\s+")])
+
+	def check(self, rhs, text, expected):
+		grammar = ComplexGrammar([('S', (rhs,), lambda *args: list(args))])
+		self.assertEqual(parse(self.lexicon, grammar, 'S', text), expected, (rhs, text))
+
+	def test_syntax(self):
+		self.check("A (B C) D", "A B C D", ['A', ('B', 'C'), 'D'])
+		self.check("A [B C] D", "A B C D", ['A', ('B', 'C'), 'D'])
+		self.check("A [B C] D", "A D", ['A', None, 'D'])
+		self.check("A {B} C", "A B B B C", ['A', ['B', 'B', 'B'], 'C'])
+		self.check("A {(B C)} D", "A B C B C D", ['A', [('B', 'C'), ('B', 'C')], 'D'])
+		self.check("A {B:C} D", "A B C B D", ['A', ['B', 'B'], 'D'])
+		self.check("A {B:C} D", "A B D", ['A', ['B'], 'D'])
+		self.check("[{B}] C", "C", [None, 'C'])
+		self.check("A | B", "A", ['A'])
+		self.check("A | (B | C)", "B", [('B',)])
+		self.check("A B C", "A B C", ['A', 'B', 'C'])
+		with self.assertRaises(ParseError):
+			self.check("A {B} C", "A C", None)
+
+	def test_alternatives(self):
+		'''An alternative of several symbols is passed as one tuple of their values, alone, grouped, optional or repeated,
+		as the nested wrapper functions used to.'''
+		self.check("(A B) | C", "A B", [('A', 'B')])
+		self.check("(A B) | C", "C", ['C'])
+		self.check("D ((A B) | C) D", "D A B D", ['D', (('A', 'B'),), 'D'])  # a group is a tuple of its values too
+		self.check("D ((A B) | C) D", "D C D", ['D', ('C',), 'D'])
+		self.check("[(A B) | C] D", "A B D", [(('A', 'B'),), 'D'])  # and so is an optional term
+		self.check("[(A B) | C] D", "C D", [('C',), 'D'])
+		self.check("{(A B) | C}", "A B C A B", [[('A', 'B'), 'C', ('A', 'B')]])
+		self.check("{(A B C) | D:C} D", "A B C C D D", [[('A', 'B', 'C'), 'D'], 'D'])
+		self.check("A B | C", "A C", ['A', 'C'])  # | binds tighter than concatenation
+
+	def test_long_repetition(self):
+		self.check("A {B} C", "A" + " B" * 5000 + " C", ['A', ['B'] * 5000, 'C'])
+
+	def test_invalid(self):
+		for rhs in ("A (B", "A | | B", "{A:B C}", "[ ]"):
+			with self.assertRaises(ParseError, msg=rhs):
+				ComplexGrammar([('S', (rhs,), lambda *args: args)])
+
+
+class RegroupTest(unittest.TestCase):
+	def test_shapes(self):
+		f = lambda *args: args
+		self.assertIs(regroup(f, (0, 1, 2)), f)
+		self.assertIsInstance(regroup(f, (1, 0)), Regroup)
+		self.assertEqual(regroup(f, (1, 0))('a', 'b'), ('b', 'a'))
+		self.assertEqual(regroup(f, (0, (1, 2), 3))('a', 'b', 'c', 'd'), ('a', ('b', 'c'), 'd'))
+		self.assertEqual(regroup(f, ((0, (1,)), 2))('a', 'b', 'c'), (('a', ('b',)), 'c'))
+		self.assertEqual(regroup(f, ((0, 1),))('a', 'b'), (('a', 'b'),))
+
+	def test_pickle(self):
+		g = pickle.loads(pickle.dumps(regroup(max, (0, (1, 2)))))
+		self.assertEqual((g.func, g.shape), (max, (0, (1, 2))))
+		self.assertEqual(g(('a',), 'b', 'c'), ('b', 'c'))
+
+
+if __name__ == '__main__':
+	unittest.main()
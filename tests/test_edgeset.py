@@ -0,0 +1,107 @@
+# Earley Parser in Python 3 - EdgeSet tests
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from ..parser import Rule, Edge, EdgeSet, Recognizer, ParseError
+from .reference import ReferenceEdge, ReferenceEdgeSet, ReferenceError, recognize, edges, reference_cases
+from .support import case_inputs
+
+
+class EdgeSetTest(unittest.TestCase):
+	def setUp(self):
+		self.rule = Rule('A', ('a', 'A'), None)
+		self.other = Rule('A', ('a',), None)
+
+	def test_add(self):
+		s = EdgeSet()
+		first = s.add(Edge(self.rule.items[0], 0))
+		self.assertIs(s.add(Edge(self.rule.items[0], 0)), first)
+		self.assertIsNot(s.add(Edge(self.rule.items[0], 1)), first)
+		self.assertIsNot(s.add(Edge(self.other.items[0], 0)), first)
+		self.assertIsNot(s.add(Edge(self.rule.items[1], 0)), first)
+		self.assertEqual(len(s), 4)
+		self.assertEqual(s.duplicates, 1)
+		self.assertIn(Edge(self.rule.items[1], 0), s)
+		self.assertNotIn(Edge(self.rule.items[1], 2), s)
+
+	def test_same_as_list(self):
+		'''Adding edges, some of them duplicates, some while iterating, keeps the same edges in the same order as the
+		list-based EdgeSet did.'''
+		items = self.rule.items + self.other.items
+		plan = [(items[(k * 7) % len(items)], (k * 5) % 3) for k in range(60)]
+		new, old = EdgeSet(), ReferenceEdgeSet()
+		for s, make in ((new, Edge), (old, lambda item, start: ReferenceEdge(item.rule, item.dot, start))):
+			s.add(make(*plan[0]))
+			k = 1
+			for e in s:  # grows while iterating
+				for i in range(2):
+					if k < len(plan):
+						s.add(make(*plan[k]))
+						k += 1
+		self.assertEqual([(e.item.rule, e.item.dot, e.start) for e in new], [(e.rule, e.dot, e.start) for e in old.content])
+
+	def test_waiting_on(self):
+		s = EdgeSet()
+		s.add(Edge(self.rule.items[0], 0))
+		s.add(Edge(self.rule.items[1], 0))
+		s.add(Edge(self.rule.items[2], 0))
+		self.assertEqual(s.waiting_on('a'), [s[0]])
+		self.assertEqual(s.waiting_on('A'), [s[1]])
+		self.assertEqual(list(s.waiting_on('B')), [])
+		seen = []
+		for e in s.waiting_on('a'):  # grows while iterating
+			seen.append(e)
+			if e.start < 2:
+				s.add(Edge(self.rule.items[0], e.start + 1))
+		self.assertEqual([e.start for e in seen], [0, 1, 2])
+		del s[1]
+		self.assertEqual(s.waiting_on('A'), [])
+		self.assertEqual(s.waiting_on('a'), seen)
+
+
+class ChartTest(unittest.TestCase):
+	def test_same_chart_as_reference(self):
+		'''Without Leo's optimization, the recognizer builds the same chart sets as the reference recognizer and rejects
+		the same token.'''
+		for case, tokens in case_inputs(sizes=(5, 20, 40), n=10, cases=reference_cases()):
+			try:
+				reference = recognize(case.grammar, tokens, case.start)
+			except ReferenceError as e:
+				with self.assertRaises(ParseError) as cm:
+					Recognizer(case.grammar, leo=False).recognize(tokens, case.start)
+				self.assertEqual(cm.exception.index, e.index, (case.name, [t.name for t in tokens]))
+				continue
+			chart = Recognizer(case.grammar, leo=False).recognize(tokens, case.start)
+			self.assertEqual([edges(s) for s in chart.sets], [edges(s) for s in reference], (case.name, [t.name for t in tokens]))
+
+	def test_waiting_index(self):
+		'''waiting_on() returns exactly the edges a scan over the whole set would have found, in the same order.'''
+		for case, tokens in case_inputs(sizes=(5, 20), n=5):
+			for leo in (False, True):
+				try:
+					chart = Recognizer(case.grammar, leo=leo).recognize(tokens, case.start)
+				except ParseError as e:
+					chart = e.chart
+				for sset in chart.sets:
+					symbols = {e.next() for e in sset if not e.complete()} | set(sset.waiting)
+					for sym in symbols:
+						self.assertEqual(list(sset.waiting_on(sym)), [e for e in sset if not e.complete() and e.next() == sym], (case.name, sym))
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,90 @@
+# Earley Parser in Python 3 - epsilon rule tests
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from itertools import product
+
+from ..parser import Grammar, Rule, Token, Recognizer, Parser, ParseError
+from ..epsilon_grammar import EpsilonGrammar
+from .reference import ReferenceError, recognize, parse, expand_epsilon
+
+
+def rules():
+	return [
+		Rule('S', ('A', 'b', 'B', 'A'), lambda a, b, c, d: (a, b, c, d)),
+		Rule('A', (), lambda: ''),
+		Rule('A', ('a', 'A'), lambda a, r: a + r),
+		Rule('B', (), lambda: '-'),
+		Rule('B', ('c', 'C'), lambda x, y: x + y),
+		Rule('C', (), lambda: '-'),
+		Rule('C', ('c',), lambda c: c),
+	]
+
+
+def tokens(text):
+	return [Token(c, c, c) for c in text]
+
+
+def native(grammar, start, toks):
+	try:
+		chart = Recognizer(grammar).recognize(toks, start)
+		return Parser(grammar).parse(chart, chart.tokens)
+	except ParseError:
+		return None
+
+
+def previous(grammar, start, toks):
+	try:
+		return parse(recognize(grammar, toks, start), toks)
+	except ReferenceError:
+		return None
+
+
+class EpsilonTest(unittest.TestCase):
+	def test_same_as_expansion(self):
+		'''Epsilon rules handled by the recognizer, in a plain Grammar or an EpsilonGrammar, give the same values as the
+		grammar EpsilonGrammar used to expand them into.'''
+		expanded = Grammar(expand_epsilon(EpsilonGrammar(rules())))
+		accepted = 0
+		for n in range(6):
+			for text in product('abc', repeat=n):
+				toks = tokens(text)
+				expected = previous(expanded, 'S', toks)
+				accepted += expected is not None
+				self.assertEqual(native(Grammar(rules()), 'S', toks), expected, text)
+				self.assertEqual(native(EpsilonGrammar(rules()), 'S', toks), expected, text)
+		self.assertGreater(accepted, 20)
+
+	def test_nullable(self):
+		g = EpsilonGrammar(rules())
+		self.assertEqual({t: g.nullability[t] for t in g.terms}, {'S': False, 'A': True, 'B': True, 'C': True})
+		self.assertEqual(set(g.nully_rules), {'A', 'B', 'C'})
+		self.assertEqual(Grammar(rules()).compile().nullable, {'A', 'B', 'C'})
+
+	def test_nullable_start(self):
+		'''A start symbol that derives the empty string accepts the empty input.'''
+		r = rules() + [Rule('T', ('A', 'B'), lambda a, b: (a, b))]
+		for grammar in (Grammar(r), EpsilonGrammar(r)):
+			self.assertEqual(native(grammar, 'T', []), ('', '-'))
+			self.assertEqual(native(grammar, 'B', []), '-')
+			self.assertEqual(native(grammar, 'A', []), '')
+			self.assertEqual(native(grammar, 'T', tokens('aac')), ('aa', 'c-'))
+			self.assertIsNone(native(grammar, 'S', []))
+
+
+if __name__ == '__main__':
+	unittest.main()
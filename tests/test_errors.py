@@ -0,0 +1,99 @@
+# Earley Parser in Python 3 - ParseError tests
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pickle
+import unittest
+
+from ..parser import Scanner, Recognizer, Parser, ParseError, LimitError, Limits, parse
+from ..calc import math_lexicon, math_grammar
+
+expected_after_op = {'(', 'ident', 'number', 'op0'}
+
+
+def recognize(text, **options):
+	tokens = list(Scanner(math_lexicon).scan(text))
+	return Recognizer(math_grammar, **options).recognize(tokens, 'expression')
+
+
+class ParseErrorTest(unittest.TestCase):
+	def test_unexpected_token(self):
+		with self.assertRaises(ParseError) as cm:
+			recognize("1+*3")
+		e = cm.exception
+		self.assertEqual((e.index, e.pos), (2, 2))
+		self.assertEqual((e.token.name, e.token.text), ('op1', '*'))
+		self.assertEqual(e.expected, expected_after_op)
+		self.assertEqual(str(e), "Unexpected {!r} at token 2 (pos=2), expected one of (, ident, number, op0".format(e.token))
+		self.assertEqual(len(e.chart), 3)
+		self.assertEqual(len(e.chart.tokens), 2)
+
+	def test_dump(self):
+		with self.assertRaises(ParseError) as cm:
+			recognize("1+*3")
+		dump = cm.exception.dump()
+		sets = dump.split("\n},")
+		self.assertEqual(len(sets), 4)  # and what follows the last one
+		self.assertTrue(sets[0].startswith("{ @0 Token{number = '1'}"))
+		self.assertTrue(sets[1].startswith("\n{ @1 Token{op0 = '+'}"))
+		self.assertTrue(sets[2].startswith("\n{ @2 None"))
+		self.assertIn("(expression2 ::= expression2 op0 . expression1 @ 0)", sets[2])
+		self.assertEqual(sum(line.startswith("\t") for line in dump.split("\n")), sum(len(s) for s in cm.exception.chart.sets))
+
+	def test_keep_chart(self):
+		'''Without the chart, an error has the same details, and dump() returns None.'''
+		with self.assertRaises(ParseError) as kept:
+			recognize("1+*3")
+		with self.assertRaises(ParseError) as cm:
+			recognize("1+*3", keep_chart=False)
+		e = cm.exception
+		self.assertIsNone(e.chart)
+		self.assertIsNone(e.dump())
+		self.assertEqual((str(e), e.index, e.pos, e.expected), (str(kept.exception), 2, 2, expected_after_op))
+
+	def test_end_of_input(self):
+		with self.assertRaises(ParseError) as cm:
+			parse(math_lexicon, math_grammar, 'expression', "1+")
+		e = cm.exception
+		self.assertEqual((e.index, e.token, e.pos, e.expected), (2, None, None, expected_after_op))
+		chart = recognize("(1")
+		with self.assertRaises(ParseError) as cm:
+			Parser(math_grammar).parse(chart, chart.tokens)
+		self.assertIn(')', cm.exception.expected)
+
+	def test_no_token(self):
+		with self.assertRaises(ParseError) as cm:
+			parse(math_lexicon, math_grammar, 'expression', "1 $ 2")
+		e = cm.exception
+		self.assertEqual((e.index, e.token, e.pos, e.expected), (None, None, 2, frozenset()))
+
+	def test_pickle(self):
+		'''A pickled error leaves the chart behind and keeps everything else.'''
+		with self.assertRaises(ParseError) as cm:
+			recognize("1+*3")
+		e = pickle.loads(pickle.dumps(cm.exception))
+		self.assertIs(type(e), ParseError)
+		self.assertIsNone(e.chart)
+		self.assertEqual((str(e), e.index, e.pos, e.expected), (str(cm.exception), 2, 2, expected_after_op))
+		self.assertEqual(e.token.text, '*')
+		with self.assertRaises(LimitError) as cm:
+			recognize("1+2+3", limits=Limits(max_tokens=2))
+		e = pickle.loads(pickle.dumps(cm.exception))
+		self.assertEqual((e.limit, e.value, e.index, e.chart), ('max_tokens', 2, 2, None))
+
+
+if __name__ == '__main__':
+	unittest.main()
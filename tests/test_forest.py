@@ -0,0 +1,79 @@
+# Earley Parser in Python 3 - Parse forest tests
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from ..parser import Grammar, Rule, Token, Recognizer
+from ..forest import Forest, by_priority
+
+
+def forest(grammar, text, start, leo=True):
+	return Forest(Recognizer(grammar, leo=leo, forest=True).recognize([Token(c, c, c) for c in text], start))
+
+
+class ForestTest(unittest.TestCase):
+	def test_count(self):
+		grammar = Grammar([
+			Rule('E', ('E', '+', 'E'), lambda a, p, b: (a, b)),
+			Rule('E', ('1',), lambda x: 1),
+		])
+		f = forest(grammar, "1+1+1+1", 'E')
+		self.assertEqual(f.count(), 5)
+		self.assertEqual(sorted(map(repr, f.trees())), sorted(map(repr, [
+			(1, (1, (1, 1))), (1, ((1, 1), 1)), ((1, 1), (1, 1)), ((1, (1, 1)), 1), (((1, 1), 1), 1)])))
+
+	def test_count_empty_derivations(self):
+		# A derives the empty string through B and through C, which count() does not tell apart
+		grammar = Grammar([
+			Rule('S', ('A', 'x'), lambda a, x: a),
+			Rule('A', ('B',), lambda b: b),
+			Rule('A', ('C',), lambda c: c),
+			Rule('B', (), lambda: 'B'),
+			Rule('C', (), lambda: 'C'),
+		])
+		f = forest(grammar, "x", 'S')
+		self.assertEqual(f.count(), 1)
+		self.assertEqual(list(f.trees()), ['B'])
+
+	def test_by_priority_earlier_child(self):
+		# "aab" is A=a B=ab or A=aa B=b; both B rules have the same priority, so the A rules decide
+		for a_priority, expected in ((1, ('aa', 'b')), (-1, ('a', 'ab'))):
+			grammar = Grammar([
+				Rule('S', ('A', 'B'), lambda a, b: (a, b)),
+				Rule('A', ('a',), lambda a: a),
+				Rule('A', ('a', 'a'), lambda a, b: a + b, a_priority),
+				Rule('B', ('a', 'b'), lambda a, b: a + b),
+				Rule('B', ('b',), lambda b: b),
+			])
+			for leo in (True, False):
+				f = forest(grammar, "aab", 'S', leo)
+				self.assertEqual(f.count(), 2)
+				self.assertEqual(f.parse(by_priority), expected)
+
+	def test_by_priority_last_child(self):
+		grammar = Grammar([
+			Rule('E', ('E', '+', 'E'), lambda a, p, b: (a, '+', b), 2),
+			Rule('E', ('E', '*', 'E'), lambda a, p, b: (a, '*', b), 1),
+			Rule('E', ('1',), lambda x: 1),
+		])
+		# the top rule has the highest priority
+		self.assertEqual(forest(grammar, "1+1*1", 'E').parse(by_priority), (1, '+', (1, '*', 1)))
+		self.assertEqual(forest(grammar, "1*1+1", 'E').parse(by_priority), ((1, '*', 1), '+', 1))
+
+
+if __name__ == '__main__':
+	unittest.main()
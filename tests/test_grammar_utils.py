@@ -0,0 +1,113 @@
+# Earley Parser in Python 3 - grammar_utils tests
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import pickle
+import unittest
+
+from ..grammar_utils import Node, SlotNode, node_class, dump, stringify
+
+BinOp = node_class('BinOp', ('left', 'op', 'right'))
+
+
+def tree():
+	return BinOp(BinOp(1, '+', 2), '*', [BinOp(left=3, op='-', right=(4, 'x')), [], Node('Leaf', value=None)])
+
+
+class NodeClassTest(unittest.TestCase):
+	def test_fields(self):
+		n = BinOp(1, '+', right=2)
+		self.assertIsInstance(n, SlotNode)
+		self.assertEqual((n.type, n.fields, n.left, n.op, n.right), ('BinOp', ('left', 'op', 'right'), 1, '+', 2))
+		self.assertEqual(n.items(), [('left', 1), ('op', '+'), ('right', 2)])
+		self.assertFalse(hasattr(n, '__dict__'))
+		self.assertIs(node_class('BinOp', ['left', 'op', 'right']), BinOp)
+		self.assertIsNot(node_class('BinOp', ('left', 'right')), BinOp)
+		self.assertEqual(node_class(('not', 'a name'), ('a',)).__name__, 'SlotNode')
+
+	def test_wrong_arguments(self):
+		for args, kwargs in (((1, 2, 3, 4), {}), ((1, 2), {}), ((1, 2), {'left': 3}), ((1, 2, 3), {'other': 4})):
+			with self.assertRaises(TypeError, msg=(args, kwargs)):
+				BinOp(*args, **kwargs)
+
+	def test_reserved_fields(self):
+		'''Fields cannot hide what dump() and the node machinery use.'''
+		for name in ('type', 'fields', 'items', '__init__', '__reduce__', '__slots__'):
+			with self.assertRaises(ValueError, msg=name):
+				node_class('Bad', ('ok', name))
+		n = node_class('Good', ('item', 'kind', 'values'))(1, 2, 3)
+		self.assertEqual(stringify(n, compact=True), "'Good' {'item': 1, 'kind': 2, 'values': 3}")
+
+	def test_pickle(self):
+		t = tree()
+		self.assertEqual(stringify(pickle.loads(pickle.dumps(t))), stringify(t))
+		n = pickle.loads(pickle.dumps(node_class(('odd', 1), ('a', 'b'))('x', [1])))
+		self.assertIs(type(n), node_class(('odd', 1), ('a', 'b')))
+		self.assertEqual((n.a, n.b), ('x', [1]))
+
+
+class DumpTest(unittest.TestCase):
+	def test_indented(self):
+		self.assertEqual(stringify(tree(), indent='  '), "\n".join([
+			"'BinOp' {",
+			"  'left': 'BinOp' {",
+			"    'left': 1,",
+			"    'op': '+',",
+			"    'right': 2",
+			"  },",
+			"  'op': '*',",
+			"  'right': [",
+			"    'BinOp' {",
+			"      'left': 3,",
+			"      'op': '-',",
+			"      'right': [",
+			"        4,",
+			"        'x'",
+			"      ]",
+			"    },",
+			"    [ ],",
+			"    'Leaf' {",
+			"      'value': None",
+			"    }",
+			"  ]",
+			"}",
+		]))
+		self.assertEqual(stringify(Node('Empty')), "'Empty' { }")
+
+	def test_compact(self):
+		self.assertEqual(stringify(tree(), compact=True),
+			"'BinOp' {'left': 'BinOp' {'left': 1, 'op': '+', 'right': 2}, 'op': '*', "
+			"'right': ['BinOp' {'left': 3, 'op': '-', 'right': [4, 'x']}, [], 'Leaf' {'value': None}]}")
+		self.assertEqual(stringify(Node('Empty'), compact=True), "'Empty' {}")
+
+	def test_level(self):
+		self.assertEqual(stringify([1], level=2), "[\n\t\t\t1\n\t\t]")
+
+	def test_deep_and_long(self):
+		'''Deep trees need no recursion, and long output is written in pieces with the same result.'''
+		x = 0
+		for i in range(20000):
+			x = BinOp(x, '+', i)
+		fp = io.StringIO()
+		dump(x, fp, compact=True)
+		self.assertTrue(fp.getvalue().startswith("'BinOp' {'left': 'BinOp' {"))
+		self.assertEqual(fp.getvalue().count("'op': '+'"), 20000)
+		self.assertEqual(str(tree()), stringify(tree()))
+
+
+if __name__ == '__main__':
+	unittest.main()
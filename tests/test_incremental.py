@@ -0,0 +1,112 @@
+# Earley Parser in Python 3 - IncrementalParser tests
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import random
+import re
+import unittest
+
+from ..parser import Lexicon, Entry, Grammar, Rule, parse
+from ..epsilon_grammar import EpsilonGrammar
+from ..incremental import IncrementalParser
+from ..calc import math_lexicon, math_grammar
+from ..complex_grammar import example
+
+
+def cases():
+	'''(name, lexicon, grammar, start, text, regex of a spot to replace, replacements that keep the text valid)'''
+	list_lexicon, list_grammar = example()
+	lexicon = Lexicon([Entry('x', r'x', lambda m: 1), Entry('y', r'y', lambda m: 2), Entry(';', r';'), Entry(None, r'\s+')])
+	statements = [
+		Rule('S', ('x', ';'), lambda x, s: x),
+		Rule('S', ('y', 'y', ';'), lambda a, b, s: a + b),
+	]
+	right = Grammar([Rule('L', ('S', 'L'), lambda s, l: [s] + l), Rule('L', ('S',), lambda s: [s])] + statements)
+	left = Grammar([Rule('L', ('L', 'S'), lambda l, s: l + [s]), Rule('L', ('S',), lambda s: [s])] + statements)
+	epsilon = EpsilonGrammar([
+		Rule('S', ('A', 'S'), lambda a, s: [a] + s),
+		Rule('S', (), lambda: []),
+		Rule('A', ('O', 'x', 'O'), lambda a, x, b: (a, x, b)),
+		Rule('A', ('y',), lambda y: 'y'),
+		Rule('O', (';',), lambda s: ';'),
+		Rule('O', (), lambda: None),
+	])
+	statement_edits = ['x;', 'y y;', 'x; x;', 'y y; x; y y;', 'yy;']
+	return [
+		('calc', math_lexicon, math_grammar, 'expression', '1+2*(3-4)/sqrt(16)+PI*2-3', r'[0-9]+|PI',
+			['7', '12', '3+4', '(5*6)', 'sqrt(9)', '2-(1+1)', 'PI', '8 * 9 - 1'], ['+', '*']),
+		('list', list_lexicon, list_grammar, 'item', '({5, 3}, ((1, 2), (4, 7, {)}))', r'[0-9]+',
+			['9', '12', '(1, 2)', '{}', '3, 4', '((5))', '{1,{2,{3}}}'], [', ']),
+		('right', lexicon, right, 'L', 'x; y y; x; x; y y; x;', r'x;|y y;', statement_edits, [' ', '']),
+		('left', lexicon, left, 'L', 'x; y y; x; x; y y; x;', r'x;|y y;', statement_edits, [' ', '']),
+		('epsilon', lexicon, epsilon, 'S', 'x; y ;x; x y y;x', r'x|y|;', ['x', 'y', ';', '', 'x;x', ';y;'], [' ', '']),
+	]
+
+
+def outcome(func):
+	try:
+		return ('ok', func())
+	except ValueError as e:
+		return ('error', type(e).__name__)
+
+
+class IncrementalParserTest(unittest.TestCase):
+	def test_random_edits(self):
+		'''Random edits, valid ones at the spots of each case and arbitrary ones that are undone right away, give the same
+		value or error as parsing the whole new text.'''
+		rnd = random.Random(0)
+		spliced = 0
+		for name, lexicon, grammar, start, text, spot, replacements, separators in cases():
+			for leo in (True, False):
+				for combined in (False, True):
+					p = IncrementalParser(lexicon, grammar, start, combined=combined, leo=leo)
+					p.parse(text)
+					current = text
+					for step in range(60):
+						spots = list(re.finditer(spot, current))
+						undo = None
+						if rnd.random() < 0.7 and spots:
+							m = rnd.choice(spots)
+							a, b, replacement = m.start(), m.end(), rnd.choice(replacements)
+							if len(current) > 200 and len(replacement) > b - a:
+								replacement = current[a:b]
+							if rnd.random() < 0.3:
+								a = b
+								replacement = rnd.choice(separators) + replacement
+						else:
+							a = rnd.randrange(len(current) + 1)
+							b = min(len(current), a + rnd.choice([0, 1, 2]))
+							replacement = "".join(rnd.choice(' (){}+,;xy19') for i in range(rnd.choice([0, 1, 2])))
+							undo = (a, a + len(replacement), current[a:b])
+						for edit in [(a, b, replacement)] + ([undo] if undo else []):
+							got = outcome(lambda: p.edit(*edit))
+							current = current[:edit[0]] + edit[2] + current[edit[1]:]
+							self.assertEqual(p.text, current)
+							self.assertEqual(got, outcome(lambda: parse(lexicon, grammar, start, current)), (name, leo, current))
+							spliced += p.last_edit['spliced'] > 0
+		self.assertGreater(spliced, 0)
+
+	def test_edit_reuses_chart(self):
+		p = IncrementalParser(math_lexicon, math_grammar, 'expression')
+		text = "+".join(str(i) for i in range(200))
+		self.assertEqual(p.parse(text), sum(range(200)))
+		self.assertEqual(p.edit(text.index("+100+") + 1, text.index("+100+") + 4, "1"), sum(range(200)) - 99)
+		self.assertLess(p.last_edit['recognized'], 10)
+		self.assertGreater(p.last_edit['spliced'], 100)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,100 @@
+# Earley Parser in Python 3 - Limits tests
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pickle
+import unittest
+from time import perf_counter
+
+from ..parser import Grammar, Rule, Token, Recognizer, StreamingRecognizer, Limits, LimitError, ParseError
+
+
+def wide_grammar(n=200):
+	'''Chart set 0 has n + 2 edges. Completing N in set 1 advances n of them at once, and each of those predicts a T rule,
+	so set 1 ends up with 2n + 1 edges.'''
+	rules = [Rule('N', ('x',), lambda x: x)]
+	for i in range(n):
+		rules.append(Rule('S', ('N', 'T{:d}'.format(i)), lambda n, t: t))
+		rules.append(Rule('T{:d}'.format(i), ('t',), lambda t: t))
+	return Grammar(rules)
+
+
+class LimitsTest(unittest.TestCase):
+	def setUp(self):
+		self.interval = StreamingRecognizer.check_interval
+
+	def tearDown(self):
+		StreamingRecognizer.check_interval = self.interval
+
+	def recognize(self, limits, tokens="x"):
+		return Recognizer(wide_grammar(), limits=limits).recognize([Token(c, c, c) for c in tokens], 'S')
+
+	def test_unreached(self):
+		chart = self.recognize(Limits(1000, 1000, 10, 3600))
+		self.assertEqual([len(s) for s in chart.sets], [202, 401])
+
+	def test_max_set_edges(self):
+		with self.assertRaises(LimitError) as cm:
+			self.recognize(Limits(max_set_edges=250))
+		e = cm.exception
+		self.assertEqual((e.limit, e.value, e.index), ('max_set_edges', 250, 1))
+		self.assertEqual(len(e.chart[1]), 251)  # stopped halfway through closing the set
+		self.assertEqual(e.edges, 202 + 251)
+
+	def test_wide_prediction(self):
+		'''A single prediction adding many edges is stopped as soon as the set exceeds the limit.'''
+		grammar = Grammar([Rule('S', ('x{:d}'.format(i),), lambda x: x) for i in range(10000)])
+		for limits in (Limits(max_set_edges=10), Limits(max_edges=10)):
+			with self.assertRaises(LimitError) as cm:
+				Recognizer(grammar, limits=limits).recognize([Token('x7', 'x7', 'x7')], 'S')
+			e = cm.exception
+			self.assertEqual((e.index, e.edges), (0, 11))
+			self.assertEqual(len(e.chart[0]), 11)
+
+	def test_max_edges(self):
+		with self.assertRaises(LimitError) as cm:
+			self.recognize(Limits(max_edges=300))
+		e = cm.exception
+		self.assertEqual((e.limit, e.index), ('max_edges', 1))
+		self.assertEqual(e.edges, 301)
+		self.assertIsInstance(e, ParseError)
+
+	def test_timeout_within_set(self):
+		StreamingRecognizer.check_interval = 10
+		s = Recognizer(wide_grammar(), limits=Limits(timeout=3600)).stream('S')
+		s.close()
+		s.feed(Token('x', 'x', 'x'))
+		s.deadline = perf_counter()  # time is up while chart set 1 is being closed
+		with self.assertRaises(LimitError) as cm:
+			s.finish()
+		self.assertEqual((cm.exception.limit, cm.exception.index), ('timeout', 1))
+		self.assertLess(len(s.chart[1]), 20)
+
+	def test_max_tokens(self):
+		with self.assertRaises(LimitError) as cm:
+			Recognizer(Grammar([Rule('L', ('L', 'x'), lambda l, x: l + 1), Rule('L', ('x',), lambda x: 1)]), limits=Limits(max_tokens=3)).recognize([Token('x', 'x', 'x')] * 5, 'L')
+		self.assertEqual((cm.exception.limit, cm.exception.index), ('max_tokens', 3))
+
+	def test_pickle(self):
+		with self.assertRaises(LimitError) as cm:
+			self.recognize(Limits(max_set_edges=250))
+		e = pickle.loads(pickle.dumps(cm.exception))
+		self.assertEqual((e.limit, e.value, e.index, e.edges, str(e)), ('max_set_edges', 250, 1, 453, str(cm.exception)))
+		self.assertIsNone(e.chart)
+
+
+if __name__ == '__main__':
+	unittest.main()
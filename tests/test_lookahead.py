@@ -0,0 +1,64 @@
+# Earley Parser in Python 3 - Lookahead tests
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from ..parser import Grammar, Rule, Token, Recognizer
+from ..forest import Forest
+from .support import case_inputs, outcome
+
+
+class LookaheadTest(unittest.TestCase):
+	def test_same_outcome(self):
+		'''Prediction filtered by lookahead gives the same values and errors, on valid and invalid inputs.'''
+		for case, tokens in case_inputs():
+			for leo in (True, False):
+				self.assertEqual(
+					outcome(case.grammar, case.start, tokens, leo=leo, lookahead=True),
+					outcome(case.grammar, case.start, tokens, leo=leo),
+					(case.name, [t.name for t in tokens], leo))
+
+	def test_nullable_rules(self):
+		# A -> O O is nullable but can also start with o, so it has to be predicted before an o
+		grammar = Grammar([
+			Rule('S', ('A', 'x'), lambda a, x: a + x),
+			Rule('A', ('O', 'O'), lambda a, b: a + b),
+			Rule('O', ('o',), lambda o: o),
+			Rule('O', (), lambda: ''),
+		])
+		for text in ("x", "ox", "oox", "ooox", "xo"):
+			tokens = [Token(c, c, c) for c in text]
+			self.assertEqual(outcome(grammar, 'S', tokens, lookahead=True), outcome(grammar, 'S', tokens), text)
+
+	def test_same_forest(self):
+		for case, tokens in case_inputs(sizes=(5, 20), n=10):
+			counts = []
+			for lookahead in (False, True):
+				try:
+					counts.append(Forest(Recognizer(case.grammar, forest=True, lookahead=lookahead).recognize(tokens, case.start)).count())
+				except ValueError as e:
+					counts.append(type(e))
+			self.assertEqual(counts[0], counts[1], (case.name, [t.name for t in tokens]))
+
+	def test_fewer_edges(self):
+		for case, tokens in case_inputs(sizes=(60,), n=0):
+			edges = [sum(len(s) for s in Recognizer(case.grammar, lookahead=lookahead).recognize(tokens, case.start).sets) for lookahead in (False, True)]
+			self.assertLessEqual(edges[1], edges[0], case.name)
+
+
+if __name__ == '__main__':
+	unittest.main()
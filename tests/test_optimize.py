@@ -0,0 +1,78 @@
+# Earley Parser in Python 3 - Grammar optimization tests
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import pickle
+import unittest
+
+from ..parser import Grammar, Rule, Token, Scanner, Recognizer, Parser, ParseError
+from ..calc import math_lexicon, math_grammar
+from ..optimize import optimize, rule_list
+from .support import case_inputs
+
+
+def outcome(grammar, start, tokens):
+	'''Like support.outcome, but without the expected terminals, which may differ where optimize() removed dead rules.'''
+	try:
+		chart = Recognizer(grammar).recognize(tokens, start)
+		return ('ok', Parser(grammar).parse(chart, chart.tokens))
+	except ParseError as e:
+		return ('error', e.index)
+	except ValueError as e:
+		return ('failed', type(e.__cause__ or e).__name__)
+
+
+def unit(x):
+	return ('unit', x)
+
+
+def join(*args):
+	return args
+
+
+class OptimizeTest(unittest.TestCase):
+	def test_same_outcome(self):
+		'''Optimized grammars give the same values and error positions on valid and invalid inputs.'''
+		optimized = {}
+		for case, tokens in case_inputs(sizes=(1, 5, 20, 80), n=30, seed=4):
+			if case.name not in optimized:
+				optimized[case.name] = optimize(case.grammar, case.start)
+			self.assertEqual(outcome(optimized[case.name], case.start, tokens), outcome(case.grammar, case.start, tokens),
+				(case.name, [t.name for t in tokens]))
+
+	def test_steps(self):
+		grammar = Grammar([
+			Rule('S', ('A', 'z'), join),
+			Rule('A', ('B',), unit),  # unit rule
+			Rule('B', ('x', 'C'), join),
+			Rule('C', ('y',), unit),  # used once
+			Rule('D', ('x',), unit),  # unreachable
+			Rule('E', ('E', 'x'), join),  # unproductive
+			Rule('S', ('E',), unit),
+		])
+		optimized = optimize(grammar, 'S')
+		self.assertEqual([(r.lhs, tuple(r.rhs)) for r in rule_list(optimized)], [('S', ('x', 'y', 'z'))])
+		tokens = [Token(c, c, c) for c in "xyz"]
+		for g in (grammar, optimized, pickle.loads(pickle.dumps(optimized))):
+			self.assertEqual(outcome(g, 'S', tokens), ('ok', (('unit', ('x', ('unit', 'y'))), 'z')))
+
+	def test_fewer_edges(self):
+		tokens = list(Scanner(math_lexicon).scan("1+2*(3-4)/sqrt(16)+PI*2-3*-(1+2)^2"))
+		edges = [sum(len(s) for s in Recognizer(g).recognize(tokens, 'expression').sets) for g in (math_grammar, optimize(math_grammar, 'expression'))]
+		self.assertLess(edges[1], edges[0])
+
+if __name__ == '__main__':
+	unittest.main()
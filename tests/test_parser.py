@@ -0,0 +1,70 @@
+# Earley Parser in Python 3 - Parser tests
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from ..parser import Grammar, Rule, Token, Recognizer, Parser, ParseError
+from .reference import ReferenceError, recognize, parse, reference_cases
+from .support import case_inputs
+
+
+class ParserTest(unittest.TestCase):
+	def test_same_values_as_reference(self):
+		'''The iterative builder gives the same values as the recursive one, with and without Leo items.'''
+		checked = 0
+		for case, tokens in case_inputs(sizes=(5, 20, 40), n=10, cases=reference_cases()):
+			try:
+				expected = parse(recognize(case.grammar, tokens, case.start), tokens)
+			except (ReferenceError, ValueError):
+				continue
+			for leo in (False, True):
+				chart = Recognizer(case.grammar, leo=leo).recognize(tokens, case.start)
+				self.assertEqual(Parser(case.grammar).parse(chart, chart.tokens), expected, (case.name, leo))
+			checked += 1
+		self.assertGreater(checked, 50)
+
+	def test_children_in_order(self):
+		g = Grammar([Rule('S', ('a', 'b', 'c', 'd', 'e'), lambda *args: args)])
+		tokens = [Token(c, c, c.upper()) for c in 'abcde']
+		chart = Recognizer(g).recognize(tokens, 'S')
+		self.assertEqual(Parser(g).parse(chart, chart.tokens), ('A', 'B', 'C', 'D', 'E'))
+
+	def test_deep_trees(self):
+		'''Deep nesting and long right-hand sides need no Python recursion.'''
+		n = 20000
+		right = Grammar([Rule('R', ('a', 'R'), lambda a, r: r + 1), Rule('R', ('a',), lambda a: 1)])
+		left = Grammar([Rule('L', ('L', 'a'), lambda l, a: l + 1), Rule('L', ('a',), lambda a: 1)])
+		tokens = [Token('a', 'a', 'a')] * n
+		for g, start in ((right, 'R'), (left, 'L')):
+			chart = Recognizer(g).recognize(tokens, start)
+			self.assertEqual(Parser(g).parse(chart, chart.tokens), n)
+		nested = Grammar([Rule('P', ('(', 'P', ')'), lambda l, p, r: p + 1), Rule('P', (), lambda: 0)])
+		tokens = [Token('(', '(', '(')] * 2000 + [Token(')', ')', ')')] * 2000
+		chart = Recognizer(nested).recognize(tokens, 'P')
+		self.assertEqual(Parser(nested).parse(chart, chart.tokens), 2000)
+
+	def test_no_parse(self):
+		g = Grammar([Rule('S', ('a', 'b'), lambda a, b: a + b)])
+		chart = Recognizer(g).recognize([Token('a', 'a', 'a')], 'S')
+		with self.assertRaises(ParseError) as cm:
+			Parser(g).parse(chart, chart.tokens)
+		self.assertEqual(cm.exception.index, 1)
+		self.assertEqual(cm.exception.expected, {'b'})
+
+
+if __name__ == '__main__':
+	unittest.main()
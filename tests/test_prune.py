@@ -0,0 +1,55 @@
+# Earley Parser in Python 3 - Chart pruning tests
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from ..parser import Scanner, Recognizer, StreamingRecognizer
+from ..benchmark import suite_cases
+from .support import case_inputs, outcome
+
+
+class PruneTest(unittest.TestCase):
+	def setUp(self):
+		self.interval = StreamingRecognizer.prune_interval
+
+	def tearDown(self):
+		StreamingRecognizer.prune_interval = self.interval
+
+	def test_same_outcome(self):
+		'''Pruning every few tokens gives the same values and errors, on valid and invalid inputs.'''
+		for interval in (1, 3, 16):
+			StreamingRecognizer.prune_interval = interval
+			for case, tokens in case_inputs(sizes=(5, 20, 80), n=10, seed=interval):
+				for leo in (True, False):
+					for lookahead in (False, True):
+						self.assertEqual(
+							outcome(case.grammar, case.start, tokens, leo=leo, lookahead=lookahead, prune=True),
+							outcome(case.grammar, case.start, tokens, leo=leo, lookahead=lookahead),
+							(interval, case.name, [t.name for t in tokens], leo, lookahead))
+
+	def test_sets_are_dropped(self):
+		StreamingRecognizer.prune_interval = 4
+		for case in suite_cases():
+			if case.name in ('right-recursive', 'ambiguous'):
+				continue  # every set has an edge waiting on a nonterminal that can still be completed
+			tokens = list(Scanner(case.lexicon).scan(case.text(200)))
+			chart = Recognizer(case.grammar, prune=True).recognize(tokens, case.start)
+			self.assertGreater(sum(1 for s in chart.sets if s is None), len(chart) // 2, case.name)
+
+
+if __name__ == '__main__':
+	unittest.main()
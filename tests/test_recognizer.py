@@ -0,0 +1,61 @@
+# Earley Parser in Python 3 - Recognizer tests
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+from itertools import count
+
+from ..parser import Grammar, Rule, Item, Token, Recognizer, Parser
+
+
+def tokens(text):
+	return [Token(c, c, c) for c in text]
+
+
+def sum_grammar():
+	return Grammar([
+		Rule('S', ('S', '+', 'N'), lambda s, p, n: s + n),
+		Rule('S', ('N',), lambda n: n),
+		Rule('N', ('1',), lambda x: 1),
+		Rule('N', ('(', 'S', ')'), lambda l, s, r: s),
+	])
+
+
+class StartRuleTest(unittest.TestCase):
+	def test_start_item_is_shared(self):
+		grammar = sum_grammar()
+		recognizer = Recognizer(grammar)
+		first = recognizer.recognize(tokens("1+1"), 'S')[0][0].item
+		second = recognizer.recognize(tokens("1"), 'S')[0][0].item
+		self.assertIs(first, second)
+		self.assertIsNot(recognizer.recognize(tokens("1"), 'N')[0][0].item, first)
+
+	def test_large_item_numbers(self):
+		# edge keys must stay distinct when item numbers are further apart than 2**32: number the complete start item
+		# (S' -> S .) so that a key of the form (start << 32) | number would equal that of (N -> 1 .) starting in set 2
+		grammar = sum_grammar()
+		one = grammar['N'][0].items[1]
+		numbers = Item.numbers
+		Item.numbers = count(one.number + (2 << 32) - 1)
+		try:
+			chart = Recognizer(grammar).recognize(tokens("1+1"), 'S')
+		finally:
+			Item.numbers = numbers
+		self.assertEqual(chart[0][0].item.advance.number, one.number + (2 << 32))
+		self.assertEqual(Parser(grammar).parse(chart, chart.tokens), 2)
+
+if __name__ == '__main__':
+	unittest.main()
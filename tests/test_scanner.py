@@ -0,0 +1,132 @@
+# Earley Parser in Python 3 - Scanner tests
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import io
+import mmap
+import os
+import tempfile
+import unittest
+
+from ..parser import Lexicon, Entry, Scanner, ParseError
+
+
+def tokens(lexicon, inp, combined):
+	return [(t.name, t.text, t.value, t.pos) for t in Scanner(lexicon, combined=combined).scan(inp)]
+
+
+class CombinedScannerTest(unittest.TestCase):
+	def assertSameTokens(self, lexicon, inp):
+		expected = tokens(lexicon, inp, False)
+		self.assertEqual(tokens(lexicon, inp, True), expected)
+		return expected
+
+	def test_global_flags(self):
+		lexicon = Lexicon([
+			Entry('select', '(?i)select'),
+			Entry('name', '[a-z]+', lambda m: m.group()),
+			Entry('number', '(?x) [0-9]+  # digits', lambda m: int(m.group())),
+			Entry(None, r'\s+'),
+		])
+		self.assertIsNotNone(lexicon.combine()[0])
+		result = self.assertSameTokens(lexicon, "SELECT select x 12 SeLeCt")
+		self.assertEqual([t[0] for t in result], ['select', 'select', 'name', 'number', 'select'])
+		self.assertEqual(tokens(lexicon, b"Select 3", True), tokens(lexicon, b"Select 3", False))
+
+	def test_case_is_per_entry(self):
+		lexicon = Lexicon([Entry('upper', '(?i)a'), Entry('lower', 'b'), Entry('other', '[A-Z]')])
+		self.assertEqual([t[0] for t in self.assertSameTokens(lexicon, "aAbB")], ['upper', 'upper', 'lower', 'other'])
+
+	def test_fallback(self):
+		# both entries define the group "digits", so they cannot be alternatives of one regex
+		lexicon = Lexicon([
+			Entry('int', r'(?P<digits>[0-9]+)(?![.0-9])', lambda m: int(m.group('digits'))),
+			Entry('float', r'(?P<digits>[0-9]+)\.[0-9]+', lambda m: float(m.group())),
+			Entry(None, r'\s+'),
+		])
+		self.assertIsNone(lexicon.combine()[0])
+		result = self.assertSameTokens(lexicon, "1 2.5 30")
+		self.assertEqual([t[2] for t in result], [1, 2.5, 30])
+
+
+def text(x):
+	return x if isinstance(x, str) else x.decode()
+
+
+class InputTest(unittest.TestCase):
+	'''Strings, bytes-like objects and files, read in chunks of any size, give the same tokens.'''
+	lexicon = Lexicon([
+		Entry('string', r'"[^"]*"', lambda m: m.group()[1:-1]),
+		Entry('name', '[a-z]+', lambda m: m.group()),
+		Entry('number', '[0-9]+', lambda m: int(m.group())),
+		Entry(None, r'\s+'),
+	])
+	source = 'abc "short" 12 "{}" xyz 3456789 "" "a b" tail'.format("long string " * 10)
+
+	def setUp(self):
+		fd, self.path = tempfile.mkstemp()
+		with os.fdopen(fd, 'wb') as f:
+			f.write(self.source.encode())
+
+	def tearDown(self):
+		os.remove(self.path)
+
+	def scan(self, inp, combined=False, chunk_size=1 << 16):
+		return [(t.name, text(t.text), text(t.value) if isinstance(t.value, bytes) else t.value, t.pos)
+			for t in Scanner(self.lexicon, combined=combined, chunk_size=chunk_size).scan(inp)]
+
+	def inputs(self):
+		data = self.source.encode()
+		yield 'bytes', lambda: data
+		yield 'bytearray', lambda: bytearray(data)
+		yield 'memoryview', lambda: memoryview(data)
+		for chunk_size in (1, 2, 3, 5, 8, 13, 64, 1 << 16):
+			yield 'text file', lambda: io.StringIO(self.source), chunk_size
+			yield 'binary file', lambda: io.BytesIO(data), chunk_size
+			yield 'real file', lambda: open(self.path, 'rb'), chunk_size
+
+	def test_same_tokens(self):
+		for combined in (False, True):
+			expected = self.scan(self.source, combined)
+			self.assertEqual(len(expected), 9)
+			self.assertEqual(expected[3][2], "long string " * 10)
+			for name, make, *chunk_size in self.inputs():
+				inp = make()
+				try:
+					self.assertEqual(self.scan(inp, combined, *chunk_size), expected, (name, chunk_size))
+				finally:
+					if hasattr(inp, 'close'):
+						inp.close()
+			with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+				self.assertEqual(self.scan(m, combined), expected)
+				self.assertEqual(m.tell(), 0)  # scanned in place, not read
+
+	def test_same_errors(self):
+		'''An unterminated string fails at its opening quote, however it is read.'''
+		for source in ('abc "def ghi jkl', 'abc def ghi jk!'):
+			with self.assertRaises(ParseError) as cm:
+				self.scan(source)
+			pos = cm.exception.pos
+			self.assertEqual(pos, source.index('"') if '"' in source else len(source) - 1)
+			for chunk_size in (1, 2, 3, 7, 64):
+				for inp in (io.StringIO(source), io.BytesIO(source.encode())):
+					with self.assertRaises(ParseError) as cm:
+						self.scan(inp, chunk_size=chunk_size)
+					self.assertEqual(cm.exception.pos, pos, chunk_size)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,88 @@
+# Earley Parser in Python 3 - Stats tests
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from ..parser import Lexicon, Entry, Grammar, Rule, Token, Recognizer, StreamingRecognizer, Stats, Limits, LimitError, ParseError, parse
+
+lexicon = Lexicon([Entry('n', '[0-9]+', lambda m: int(m.group())), Entry('+', r'\+'), Entry(None, r'\s+')])
+grammar = Grammar([
+	Rule('S', ('S', '+', 'n'), lambda s, p, n: s + n),
+	Rule('S', ('n',), lambda n: n),
+])
+
+
+class StatsTest(unittest.TestCase):
+	def setUp(self):
+		self.events = []
+		self.stats = Stats(lambda event, data: self.events.append((event, data)))
+
+	def test_counts(self):
+		self.assertEqual(parse(lexicon, grammar, 'S', "1 + 2", self.stats), 3)
+		d = self.stats.as_dict()
+		self.assertEqual(set(d.pop('times')), {'scan', 'recognize', 'parse'})
+		self.assertEqual(d, {
+			'tokens': 3, 'sets': 4, 'edges': 10, 'largest_set': 3, 'largest_set_index': 0,
+			'predictions': 3, 'scans': 3, 'completions': 4, 'duplicates': 0,
+		})
+		self.assertEqual(self.stats.set_sizes, [3, 3, 1, 3])
+
+	def test_events(self):
+		parse(lexicon, grammar, 'S', "1 + 2", self.stats)
+		sets = [data for event, data in self.events if event == 'set']
+		self.assertEqual([d['index'] for d in sets], [0, 1, 2, 3])
+		self.assertEqual(sets[1], {'index': 1, 'edges': 3, 'predictions': 0, 'scans': 1, 'completions': 2, 'duplicates': 0})
+		phases = [data for event, data in self.events if event == 'phase']
+		self.assertEqual([d['phase'] for d in phases], ['scan', 'recognize', 'parse'])
+		self.assertEqual({d['phase']: d['seconds'] for d in phases}, self.stats.times)
+		self.assertTrue(all(d['seconds'] >= 0 for d in phases))
+
+	def test_counts_match_chart(self):
+		'''The counts are those of the chart, and add up over several parses.'''
+		tokens = [Token('n', '1', 1)] + [Token('+', '+', None), Token('n', '1', 1)] * 20
+		for k in range(2):
+			chart = Recognizer(grammar, stats=self.stats).recognize(tokens, 'S')
+		self.assertEqual(self.stats.set_sizes, [len(s) for s in chart.sets] * 2)
+		self.assertEqual(self.stats.edges, 2 * sum(len(s) for s in chart.sets))
+		self.assertEqual(self.stats.predictions, 2 * sum(1 for s in chart.sets for e in s if e.completing is None))
+		self.assertEqual(self.stats.predictions + self.stats.scans + self.stats.completions, self.stats.edges)
+		self.assertEqual(self.stats.scans, 2 * len(tokens))
+		self.assertEqual(set(self.stats.times), {'recognize'})
+
+	def test_phases_that_ran(self):
+		'''A phase that never ran has no time, also when an earlier one failed.'''
+		with self.assertRaises(ParseError):
+			parse(lexicon, grammar, 'S', "1 + 2 +", self.stats)
+		self.assertEqual(set(self.stats.times), {'scan', 'recognize'})
+		self.assertNotIn('parse', [data['phase'] for event, data in self.events if event == 'phase'])
+
+	def test_failed_finish(self):
+		s = StreamingRecognizer(grammar, 'S', stats=self.stats, limits=Limits(max_set_edges=1))
+		with self.assertRaises(LimitError):
+			s.finish()
+		self.assertEqual(set(self.stats.times), {'recognize'})
+
+	def test_failed_feed(self):
+		s = StreamingRecognizer(grammar, 'S', stats=self.stats)
+		with self.assertRaises(ParseError):
+			s.feed(Token('+', '+', None))
+		self.assertEqual(set(self.stats.times), {'recognize'})
+		self.assertEqual(self.stats.sets, 1)
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,105 @@
+# Earley Parser in Python 3 - StreamingRecognizer tests
+# Copyright (C) 2013, 2016 tobyp
+# See <http://tobyp.net/parsepy>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from ..parser import Recognizer, StreamingRecognizer, ParseError
+from .reference import ReferenceError, recognize, edges, reference_cases
+from .support import case_inputs
+
+
+def terminals(sset, grammar):
+	'''The terminals edges of a reference chart set are waiting on.'''
+	return {e.next() for e in sset if not e.complete() and e.next() not in grammar}
+
+
+class StreamingTest(unittest.TestCase):
+	def inputs(self):
+		for case, tokens in case_inputs(sizes=(5, 20), n=10, cases=reference_cases()):
+			try:
+				reference = recognize(case.grammar, tokens, case.start)
+			except ReferenceError as e:
+				reference = e
+			yield case, tokens, reference
+
+	def test_one_set_per_token(self):
+		'''Feeding tokens one at a time builds the same chart sets as the reference recognizer, which needs all
+		tokens up front, and as Recognizer.recognize.'''
+		for case, tokens, reference in self.inputs():
+			if isinstance(reference, ReferenceError):
+				continue
+			s = StreamingRecognizer(case.grammar, case.start, leo=False)
+			for k, token in enumerate(tokens):
+				s.feed(token)
+				self.assertEqual(len(s.chart), k + 2)
+				self.assertEqual(edges(s.chart[k]), edges(reference[k]), (case.name, k))
+			chart = s.finish()
+			self.assertEqual([edges(x) for x in chart.sets], [edges(x) for x in reference])
+			self.assertEqual(chart.tokens, tokens)
+			other = Recognizer(case.grammar, leo=False).recognize(tokens, case.start)
+			self.assertEqual([edges(x) for x in chart.sets], [edges(x) for x in other.sets])
+
+	def test_fails_at_first_bad_token(self):
+		'''An unexpected token is reported by the feed() that receives it, with the same index as the reference, and
+		no token after it is pulled from the source.'''
+		for case, tokens, reference in self.inputs():
+			if not isinstance(reference, ReferenceError):
+				continue
+			pulled = []
+
+			def source():
+				for t in tokens:
+					pulled.append(t)
+					yield t
+
+			with self.assertRaises(ParseError) as cm:
+				Recognizer(case.grammar).recognize(source(), case.start)
+			self.assertEqual(cm.exception.index, reference.index)
+			self.assertEqual(len(pulled), reference.index + 1)
+			self.assertIs(cm.exception.token, tokens[reference.index])
+
+	def test_expected(self):
+		'''expected() names the terminals the reference chart set is waiting on, and feed() accepts exactly those.'''
+		for case, tokens, reference in self.inputs():
+			if isinstance(reference, ReferenceError):
+				continue
+			for leo in (False, True):
+				s = StreamingRecognizer(case.grammar, case.start, leo=leo)
+				for k, token in enumerate(tokens):
+					self.assertEqual(s.expected(), terminals(reference[k], case.grammar), (case.name, k))
+					s.feed(token)
+				self.assertEqual(s.expected(), terminals(reference[-1], case.grammar))
+
+	def test_error_leaves_chart(self):
+		'''A rejected token leaves the recognizer as it was, so feeding can carry on with another token.'''
+		for case, tokens, reference in self.inputs():
+			if not isinstance(reference, ReferenceError):
+				continue
+			s = StreamingRecognizer(case.grammar, case.start)
+			for token in tokens[:reference.index]:
+				s.feed(token)
+			expected = s.expected()
+			before = [edges(x) for x in s.chart.sets]
+			with self.assertRaises(ParseError):
+				s.feed(tokens[reference.index])
+			self.assertEqual([edges(x) for x in s.chart.sets], before)
+			self.assertEqual(len(s.chart.tokens), reference.index)
+			self.assertEqual(s.expected(), expected)
+
+
+if __name__ == '__main__':
+	unittest.main()